@@ -0,0 +1,146 @@
+"""
+Latency budget for shell completion (`s --complete <words>`).
+
+Builds the completion table once in a scratch home with a large curated commands
+file, then times each completion the way the installed `shakti` script runs it,
+keeping the best of several runs. The script exits non-zero when a completion
+goes over the budget, answers wrongly, or imports more than the completion path
+(shakti.main and shakti.completion) or a module it should never need: even json
+would pull in `re`.
+
+Usage:
+    python benchmarks/completion.py [--repeat N] [--entries N] [--budget MS]
+"""
+
+import argparse
+import compileall
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+BUDGET_MS = 20
+
+# What the installed `shakti` console script does
+ENTRY = "import sys; from shakti.main import cli; sys.exit(cli())"
+
+COMPLETION_MODULES = {"shakti", "shakti.main", "shakti.completion"}
+FORBIDDEN_MODULES = {"json", "re", "yaml", "tempfile", "subprocess"}
+
+# (words after `s`, a completion that must be among the answers)
+CASES = [
+    ([""], "git"),
+    (["git", "a"], "add"),
+    (["git", "message", "--"], "--token-budget"),
+    (["cmd", "list", "--tag", ""], "tag7"),
+    (["cmd", "list", "--tag=ta"], "--tag=tag7"),
+    (["prog4"], "prog42"),
+]
+
+
+def write_curated(path, entries):
+    with open(path, "w") as f:
+        for i in range(entries):
+            f.write(f"command: prog{i % 500} --flag {i} |tags: tag{i % 40}, misc\n")
+
+
+def run(words, env, importtime=False):
+    """Return (stdout lines, stderr, seconds) of one completion."""
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += ["-c", ENTRY, "--complete"] + words
+    started = time.perf_counter()
+    result = subprocess.run(command, env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - started
+    return result.stdout.splitlines(), result.stderr, elapsed
+
+
+def imported_modules(stderr):
+    modules = set()
+    for line in stderr.splitlines():
+        if line.startswith("import time:") and "self [us]" not in line:
+            modules.add(line.rsplit("|", 1)[1].strip())
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--repeat", type=int, default=10, help="Runs per completion (best is kept)"
+    )
+    parser.add_argument(
+        "--entries", type=int, default=20000, help="Lines in the curated file"
+    )
+    parser.add_argument(
+        "--budget", type=float, default=BUDGET_MS, help="Budget in milliseconds"
+    )
+    args = parser.parse_args()
+
+    # Byte-compile first, as installing does: compiling shakti.completion would
+    # cost more than the whole lookup
+    compileall.compile_dir(os.path.join(REPO_ROOT, "shakti"), quiet=1)
+
+    failures = []
+    with tempfile.TemporaryDirectory() as scratch:
+        env = dict(
+            os.environ,
+            PYTHONPATH=REPO_ROOT,
+            HOME=scratch,
+            XDG_CACHE_HOME=os.path.join(scratch, "cache"),
+            XDG_CONFIG_HOME=os.path.join(scratch, "config"),
+        )
+        write_curated(os.path.join(scratch, ".bash_curated_commands"), args.entries)
+        # Builds the table
+        run([""], env)
+
+        # Interleaved rounds, so every completion gets the machine's quiet moments
+        baseline = float("inf")
+        best = {i: float("inf") for i in range(len(CASES))}
+        for _ in range(args.repeat):
+            baseline = min(baseline, _time([sys.executable, "-c", "pass"], env))
+            for i, (words, _) in enumerate(CASES):
+                best[i] = min(best[i], run(words, env)[2])
+        print(f"{'python -c pass':<32} {baseline * 1000:7.1f} ms  (interpreter only)")
+
+        for i, (words, expected) in enumerate(CASES):
+            label = "s --complete " + " ".join(repr(w) if not w else w for w in words)
+            answers, stderr, _ = run(words, env, importtime=True)
+            modules = imported_modules(stderr)
+            bad = sorted(
+                name
+                for name in modules
+                if name.split(".")[0] in FORBIDDEN_MODULES
+                or (name.startswith("shakti") and name not in COMPLETION_MODULES)
+            )
+
+            ms = best[i] * 1000
+            ok = ms <= args.budget and expected in answers and not bad
+            print(
+                f"{label:<32} {ms:7.1f} ms / {args.budget:g} ms  {'ok' if ok else 'FAIL'}"
+            )
+            if ms > args.budget:
+                failures.append(f"{label}: {ms:.1f} ms over {args.budget:g} ms")
+            if expected not in answers:
+                failures.append(f"{label}: {expected!r} not in {answers[:10]}")
+            if bad:
+                failures.append(f"{label}: imported {', '.join(bad)}")
+
+    if failures:
+        print("\nCompletion budget exceeded:", file=sys.stderr)
+        for failure in failures:
+            print(f"  {failure}", file=sys.stderr)
+        sys.exit(1)
+
+
+def _time(command, env):
+    started = time.perf_counter()
+    subprocess.run(command, env=env, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - started
+
+
+if __name__ == "__main__":
+    main()
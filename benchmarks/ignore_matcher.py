@@ -0,0 +1,111 @@
+"""
+Benchmark the compiled .gitdiffignore matcher on synthetic paths.
+
+Compares IgnoreMatcher.filter against the previous per-path implementation
+(a Path per file, Path.match/is_relative_to per pattern).
+
+Usage:
+    python benchmarks/ignore_matcher.py [--paths 100000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shakti.git.utils import IgnoreMatcher  # noqa: E402
+
+PATTERNS = [
+    "poetry.lock",
+    "package-lock.json",
+    "yarn.lock",
+    "*.min.js",
+    "*.map",
+    "*.snap",
+    "*.pyc",
+    "*.svg",
+    "node_modules/",
+    "dist/",
+    "build/",
+    "vendor/",
+    "__pycache__/",
+    ".venv/",
+    "coverage/",
+    "docs/generated/",
+    "migrations/",
+    "fixtures/",
+    "*.generated.ts",
+    "*_pb2.py",
+    "*.ipynb",
+    ".vscode/settings.json",
+    ".idea/",
+    "README.md",
+    "CHANGELOG.md",
+    "LICENSE",
+    "*.csv",
+    "*.parquet",
+    "static/",
+    "tmp/",
+]
+
+DIRS = ["src", "lib", "app", "services", "tests", "docs", "web", "api", "core"]
+SUBDIRS = ["models", "views", "utils", "build", "dist", "migrations", "components"]
+NAMES = ["index", "main", "utils", "models", "api", "README", "schema", "helpers"]
+EXTENSIONS = [".py", ".ts", ".js", ".min.js", ".md", ".json", ".csv", ".pyc", ".map"]
+
+
+def synthetic_paths(count, seed=0):
+    rng = random.Random(seed)
+    paths = []
+    for i in range(count):
+        depth = rng.randint(0, 4)
+        parts = [rng.choice(DIRS)] + [rng.choice(SUBDIRS) for _ in range(depth)]
+        name = f"{rng.choice(NAMES)}{i % 97}{rng.choice(EXTENSIONS)}"
+        paths.append("/".join(parts + [name]))
+    return paths
+
+
+def legacy_is_ignored(file_path, ignore_patterns):
+    path = Path(file_path)
+    for pattern in ignore_patterns:
+        if pattern.endswith("/"):
+            if path == Path(pattern[:-1]) or path.is_relative_to(pattern):
+                return True
+        else:
+            if path.match(pattern):
+                return True
+    return False
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--paths", type=int, default=100_000)
+    args = parser.parse_args()
+
+    paths = synthetic_paths(args.paths)
+
+    matcher, compile_time = timed(lambda: IgnoreMatcher(PATTERNS))
+    kept, filter_time = timed(lambda: matcher.filter(paths))
+    legacy_kept, legacy_time = timed(
+        lambda: [p for p in paths if not legacy_is_ignored(p, PATTERNS)]
+    )
+
+    print(f"{len(paths)} paths, {len(PATTERNS)} patterns")
+    print(f"compile:          {compile_time * 1000:8.2f} ms")
+    print(f"IgnoreMatcher:    {filter_time * 1000:8.2f} ms  ({len(kept)} kept)")
+    print(f"legacy is_ignored:{legacy_time * 1000:8.2f} ms  ({len(legacy_kept)} kept)")
+    print(f"speedup:          {legacy_time / filter_time:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
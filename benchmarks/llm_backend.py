@@ -0,0 +1,125 @@
+"""
+Benchmark the built-in OpenAI-compatible backend against a local stand-in server.
+
+The stand-in streams a canned completion as server-sent events, can fail the first
+requests with 503 to exercise retries, and counts TCP connections to show that
+requests share one kept-alive connection. Nothing leaves the machine.
+
+Usage:
+    python benchmarks/llm_backend.py [--requests 20] [--failures 2] [--latency 0.01]
+"""
+
+import argparse
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shakti.llm import OpenAICompatibleBackend  # noqa: E402
+
+COMPLETION = "feat(git): stream commit messages from a native HTTP backend"
+
+
+class StandInServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, failures, latency):
+        super().__init__(("127.0.0.1", 0), StandInHandler)
+        self.failures = failures
+        self.latency = latency
+        self.connections = 0
+        self.requests = 0
+        self.lock = threading.Lock()
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        with self.server.lock:
+            self.server.requests += 1
+            fail = self.server.failures > 0
+            self.server.failures -= fail
+
+        if fail:
+            body = b'{"error": "overloaded"}'
+            self.send_response(503)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        time.sleep(self.server.latency)
+        for word in COMPLETION.split(" "):
+            delta = {"choices": [{"delta": {"content": word + " "}}]}
+            self._chunk(f"data: {json.dumps(delta)}\n\n".encode())
+        self._chunk(b"data: [DONE]\n\n")
+        self._chunk(b"")
+
+    def _chunk(self, data):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--failures", type=int, default=2)
+    parser.add_argument("--latency", type=float, default=0.01)
+    args = parser.parse_args()
+
+    server = StandInServer(args.failures, args.latency)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    backend = OpenAICompatibleBackend(
+        base_url=f"http://127.0.0.1:{server.server_address[1]}/v1",
+        model="stand-in",
+        backoff=0.05,
+    )
+
+    first_tokens, totals, attempts = [], [], 0
+    for _ in range(args.requests):
+        start = time.perf_counter()
+        first = []
+
+        def write(text):
+            if not first:
+                first.append(time.perf_counter() - start)
+
+        output = backend.stream("Give commit message", write)
+        totals.append(time.perf_counter() - start)
+        first_tokens.append(first[0])
+        attempts += backend.attempts
+        assert output.strip() == COMPLETION, output
+
+    server.shutdown()
+    print(f"{args.requests} completions, {args.failures} injected 503s")
+    print(f"HTTP requests:      {server.requests:8d}  ({attempts} attempts)")
+    print(f"TCP connections:    {server.connections:8d}")
+    print(f"first request:      {totals[0] * 1000:8.2f} ms (includes retries)")
+    steady = sorted(totals[1:]) or totals
+    print(f"median request:     {steady[len(steady) // 2] * 1000:8.2f} ms")
+    first_token = sorted(first_tokens)[len(first_tokens) // 2]
+    print(f"median first token: {first_token * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
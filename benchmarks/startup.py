@@ -0,0 +1,99 @@
+"""
+Startup import-time budget for shakti commands.
+
+Runs each command under `python -X importtime` inside a scratch git repository
+and sums the self time of every module it imports. The script exits non-zero
+when a command goes over its budget or imports a module it should never need
+(e.g. matplotlib for `s git diff`).
+
+Usage:
+    python benchmarks/startup.py [--repeat N]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The report stack is only allowed when a report actually gets generated.
+HEAVY_MODULES = {"numpy", "matplotlib", "july"}
+
+# (argv, budget in milliseconds, top-level packages that must not be imported)
+BUDGETS = [
+    (["true"], 25, HEAVY_MODULES | {"yaml"}),
+    (["hello"], 25, HEAVY_MODULES | {"yaml"}),
+    (["git", "diff"], 50, HEAVY_MODULES | {"yaml", "astor"}),
+    (["git", "tree"], 50, HEAVY_MODULES | {"yaml", "astor"}),
+    (["cmd"], 80, HEAVY_MODULES),
+    (["report"], 80, HEAVY_MODULES),
+]
+
+# Modules a passthrough command may load: only the dispatcher itself, and the
+# plugin table it checks for a plugin of that name first.
+PASSTHROUGH_SHAKTI_MODULES = {"shakti", "shakti.main", "shakti.manifest"}
+
+
+def measure(argv, cwd):
+    """Return ({module: self_us}, exit code) for one `shakti <argv>` run."""
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "shakti.main"] + argv,
+        cwd=cwd,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:") :].split("|")
+        modules[name.strip()] = int(self_us)
+    return modules, result.returncode
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="Runs per command (best is kept)"
+    )
+    args = parser.parse_args()
+
+    failures = []
+    with tempfile.TemporaryDirectory() as scratch:
+        subprocess.run(["git", "init", "-q", scratch], check=True)
+        for argv, budget_ms, forbidden in BUDGETS:
+            runs = [measure(argv, scratch)[0] for _ in range(args.repeat)]
+            modules = min(runs, key=lambda m: sum(m.values()))
+            total_ms = sum(modules.values()) / 1000
+            loaded = {name.split(".")[0] for name in modules}
+            bad = sorted(loaded & forbidden)
+            if argv == ["true"]:
+                bad += sorted(
+                    name
+                    for name in modules
+                    if name.startswith("shakti")
+                    and name not in PASSTHROUGH_SHAKTI_MODULES
+                )
+
+            label = "s " + " ".join(argv)
+            status = "ok" if total_ms <= budget_ms and not bad else "FAIL"
+            print(f"{label:<16} {total_ms:7.1f} ms / {budget_ms:3d} ms  {status}")
+            if total_ms > budget_ms:
+                failures.append(f"{label}: {total_ms:.1f} ms over {budget_ms} ms")
+            if bad:
+                failures.append(f"{label}: imported {', '.join(bad)}")
+
+    if failures:
+        print("\nStartup budget exceeded:", file=sys.stderr)
+        for failure in failures:
+            print(f"  {failure}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Benchmark the chunked .timer parser on a synthetic multi-million-line file.
+
+Compares shakti.report.timer_parser.parse_timer_file against the previous
+line-by-line regex implementation, on a file of lines in the common layout and
+on one mixing widths, other layouts and junk lines, some of which go through the
+regex fallback. Then times shakti.report.timer_totals.load_daily_totals once
+lines are appended, which only parses them. Exits non-zero if the daily totals
+differ.
+
+Usage:
+    python benchmarks/timer_parser.py [--lines 3000000] [--appended 1000]
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from shakti.report.timer_parser import CHUNK_SIZE, parse_timer_file  # noqa: E402
+from shakti.report.timer_totals import load_daily_totals  # noqa: E402
+
+PROJECTS = ["shakti", "api", "infra", "docs", "review", "on-call"]
+
+
+def synthetic_lines(count, layout, seed=0):
+    """Yield timer lines over ~8 years, a few hundred a day, oldest first."""
+    rng = random.Random(seed)
+    first_day = date(2017, 1, 1)
+    per_day = max(1, count // 3000)
+    for i in range(count):
+        day = first_day + timedelta(days=i // per_day)
+        clock = (
+            f"{rng.randrange(24):02d}:{rng.randrange(60):02d}:{rng.randrange(60):02d}"
+        )
+        duration = (
+            f"{rng.randrange(3):02d}:{rng.randrange(60):02d}:{rng.randrange(60):02d}"
+        )
+        if layout == "fixed":
+            yield f"[{day} {clock}] = [{duration}]\n"
+            continue
+        roll = rng.random()
+        if roll < 0.02:
+            yield "\n"
+        elif roll < 0.04:
+            yield f"# paused {day}\n"
+        elif roll < 0.05:
+            yield f"[{day} {clock}] = [interrupted]\n"
+        else:
+            project = rng.choice(PROJECTS)
+            yield f"[{day} {clock} {project}] = [{duration}]\n"
+
+
+def legacy_parse_timer_file(file_path):
+    data = {}
+    with open(file_path, "r") as f:
+        for line in f:
+            match = re.match(
+                r"\[(\d{4}-\d{2}-\d{2}) .*?\] = \[(\d{2}):(\d{2}):(\d{2})\]", line
+            )
+            if match:
+                date, hours, minutes, seconds = match.groups()
+                duration = int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+                data[date] = data.get(date, 0) + duration
+    return data
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lines", type=int, default=3_000_000)
+    parser.add_argument(
+        "--chunk-mb",
+        type=int,
+        default=CHUNK_SIZE // 1024 // 1024,
+        help="Chunk size of the parser in MiB",
+    )
+    parser.add_argument(
+        "--appended", type=int, default=1000, help="Lines appended between reports"
+    )
+    args = parser.parse_args()
+    chunk_size = args.chunk_mb * 1024 * 1024
+
+    mismatches = []
+    with tempfile.TemporaryDirectory() as scratch:
+        for layout in ["fixed", "mixed"]:
+            path = os.path.join(scratch, f"{layout}.timer")
+            with open(path, "w") as f:
+                f.writelines(synthetic_lines(args.lines, layout))
+            size_mb = os.path.getsize(path) / 1024 / 1024
+
+            totals, parse_time = timed(lambda: parse_timer_file(path, chunk_size))
+            legacy_totals, legacy_time = timed(lambda: legacy_parse_timer_file(path))
+
+            print(
+                f"{layout}: {args.lines} lines, {size_mb:.0f} MiB, {len(totals)} days"
+            )
+            print(f"  parse_timer_file: {parse_time * 1000:8.1f} ms")
+            print(f"  legacy per-line:  {legacy_time * 1000:8.1f} ms")
+            print(f"  speedup:          {legacy_time / parse_time:8.1f}x")
+            if totals != legacy_totals:
+                mismatches.append(layout)
+
+            store_dir = os.path.join(scratch, f"{layout}-totals")
+            _, first_time = timed(lambda: load_daily_totals(path, store_dir))
+            with open(path, "a") as f:
+                f.writelines(synthetic_lines(args.appended, layout, seed=1))
+            incremental, incremental_time = timed(
+                lambda: load_daily_totals(path, store_dir)
+            )
+            print(f"  first report:     {first_time * 1000:8.1f} ms")
+            print(
+                f"  +{args.appended} lines:     {incremental_time * 1000:8.1f} ms"
+                "  (parses the appended lines only)"
+            )
+            if incremental != parse_timer_file(path, chunk_size):
+                mismatches.append(f"{layout} (incremental)")
+
+    if mismatches:
+        print(f"\nDaily totals differ: {', '.join(mismatches)}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""
+Thin client for the resident shakti server (`s server start`).
+
+Forwards argv, the working directory, the environment variables commands use
+and the terminal file descriptors to the server, which runs the command in a process forked from its
+warm interpreter. Signals are forwarded to that process and its exit status
+becomes ours. When the server isn't running, or the command needs a controlling
+terminal, the command runs in this process as usual.
+
+Only the standard library is imported here, so the client starts in a few
+milliseconds.
+"""
+
+import json
+import os
+import signal
+import socket
+import sys
+from shakti.runtime import UnsafeRuntimeDir, check_peer, runtime_dir
+
+# Commands that need a controlling terminal (fzf, readline, editors, pagers),
+# which a process forked from the server doesn't have
+LOCAL_COMMANDS = {("cmd", "list-eval"), ("git", "difftool")}
+# Commands that page their output when writing to a terminal
+PAGED_COMMANDS = {("git", "diff"), ("cmd", "list")}
+# Top-level commands and the subcommands the server runs; anything else runs here
+SERVED_COMMANDS = {
+    "hello": None,
+    "bye": None,
+    "git": {"add", "message", "diff", "tree", "signature", "symbols"},
+    "cmd": {"list"},
+    "report": {"timer"},
+}
+
+# Environment variables sent to the server for the command, by name and by prefix.
+# The command starts from the server's own environment, i.e. the one `s server
+# start` ran in, which is where secrets like API keys come from.
+FORWARDED_ENV = {
+    "PATH",
+    "HOME",
+    "USER",
+    "LOGNAME",
+    "SHELL",
+    "TERM",
+    "COLORTERM",
+    "NO_COLOR",
+    "COLUMNS",
+    "LINES",
+    "LANG",
+    "LANGUAGE",
+    "TZ",
+    "TMPDIR",
+    "EDITOR",
+    "VISUAL",
+    "PAGER",
+    "LESS",
+    "HISTFILE",
+    "VIRTUAL_ENV",
+    "SSH_AUTH_SOCK",
+}
+FORWARDED_ENV_PREFIXES = ("LC_", "GIT_", "XDG_", "SHAKTI_")
+
+FORWARDED_SIGNALS = (
+    signal.SIGINT,
+    signal.SIGTERM,
+    signal.SIGHUP,
+    signal.SIGQUIT,
+    signal.SIGWINCH,
+)
+
+
+def socket_path(create=False):
+    """
+    Return the path of the server's Unix socket, in the checked runtime directory.
+
+    Raises OSError if the directory is missing (unless `create` is set) and
+    UnsafeRuntimeDir if it isn't safe to use.
+    """
+    return os.path.join(runtime_dir(create), "server.sock")
+
+
+def forwarded_env(environ):
+    """Return the variables of `environ` a command on the server gets."""
+    return {
+        name: value
+        for name, value in environ.items()
+        if name in FORWARDED_ENV or name.startswith(FORWARDED_ENV_PREFIXES)
+    }
+
+
+def runs_on_server(argv):
+    """Whether the server can run a command line, or it must run locally."""
+    if not argv or argv[0].startswith("-"):
+        # --help, --slist and --version are cheap and only print
+        return True
+    command = argv[0]
+    if command not in SERVED_COMMANDS:
+        return False
+    subcommands = SERVED_COMMANDS[command]
+    if subcommands is None:
+        return True
+    rest = [arg for arg in argv[1:] if not arg.startswith("-")]
+    key = (command, rest[0] if rest else "")
+    if key in LOCAL_COMMANDS or key[1] not in subcommands:
+        return False
+    return key not in PAGED_COMMANDS or not os.isatty(1)
+
+
+def _run_locally():
+    from shakti.main import cli
+
+    cli()
+
+
+def _read_message(stream):
+    line = stream.readline()
+    return json.loads(line) if line else None
+
+
+def main():
+    argv = sys.argv[1:]
+    if not runs_on_server(argv):
+        return _run_locally()
+
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(socket_path())
+        check_peer(client)
+        payload = json.dumps(
+            {"argv": argv, "cwd": os.getcwd(), "env": forwarded_env(os.environ)}
+        ).encode()
+        payload += b"\n"
+        sent = socket.send_fds(client, [payload], [0, 1, 2])
+        client.sendall(payload[sent:])
+        stream = client.makefile("rb")
+        started = _read_message(stream)
+    except UnsafeRuntimeDir as e:
+        print(f"Warning: not using the shakti server: {e}", file=sys.stderr)
+        started = None
+    except OSError:
+        started = None
+    if not started:
+        # No server, or it went away before starting the command
+        client.close()
+        return _run_locally()
+
+    pid = started["pid"]
+
+    def forward(signum, frame):
+        try:
+            os.killpg(pid, signum)
+        except OSError:
+            pass
+
+    for signum in FORWARDED_SIGNALS:
+        signal.signal(signum, forward)
+
+    try:
+        finished = _read_message(stream)
+    except (OSError, ValueError):
+        finished = None
+    sys.exit(finished["exit"] if finished else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+
+# Bump when the index layout or the line parser changes
+INDEX_VERSION = 1
+
+# Separates a command from its tags, e.g. "command: ls -la | tags: files, list".
+# The last separator wins, so commands can contain pipes themselves.
+TAGS_SEPARATOR = re.compile(r"\|\s*(?=tags\b)")
+TAG_SPLIT = re.compile(r"[,\s]+")
+
+# Fields of an entry in CommandIndex.entries
+COMMAND, RAW_TAGS, TAGS, OFFSET, LENGTH = range(5)
+
+
+def default_index_dir():
+    """Return the command index directory under $XDG_CACHE_HOME (or ~/.cache)."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(base, "shakti", "cmd-index")
+
+
+def parse_line(line):
+    """
+    Split a curated line into (command, raw_tags, tags), or None if it isn't one.
+
+    Lines look like `command: <command> |tags: <tag>, <tag>`; the "command:" and
+    "tags:" prefixes are optional, but a line needs a "|" to count.
+    """
+    line = line.strip()
+    if not line or line.startswith("#") or "|" not in line:
+        return None
+    matches = list(TAGS_SEPARATOR.finditer(line))
+    if matches:
+        split = matches[-1]
+        command, raw_tags = line[: split.start()], line[split.end() :]
+    else:
+        command, raw_tags = line.split("|", 1)
+    command = command.strip()
+    if command.startswith("command:"):
+        command = command[len("command:") :].strip()
+    raw_tags = raw_tags.strip()
+    tag_text = raw_tags[len("tags:") :] if raw_tags.startswith("tags:") else raw_tags
+    tags = sorted({tag.lower() for tag in TAG_SPLIT.split(tag_text) if tag})
+    return command, raw_tags, tags
+
+
+class CommandIndex:
+    """
+    A curated commands file compiled into parsed entries and tag postings.
+
+    Each entry is [command, raw_tags, tags, byte offset, byte length] of its line
+    in the source, so matching lines can be streamed straight from the file.
+    The index is persisted as JSON under $XDG_CACHE_HOME/shakti/cmd-index and only
+    rebuilt when the source's mtime or size changes.
+    """
+
+    def __init__(self, source, entries, postings):
+        self.source = source
+        self.entries = entries
+        self.postings = postings
+
+    @classmethod
+    def build(cls, source):
+        entries = []
+        postings = {}
+        offset = 0
+        with open(source, "rb") as f:
+            for raw in f:
+                parsed = parse_line(raw.decode("utf-8", errors="replace"))
+                if parsed:
+                    command, raw_tags, tags = parsed
+                    for tag in tags:
+                        postings.setdefault(tag, []).append(len(entries))
+                    entries.append([command, raw_tags, tags, offset, len(raw)])
+                offset += len(raw)
+        return cls(source, entries, postings)
+
+    @staticmethod
+    def _cache_location(source, index_dir=None):
+        st = os.stat(source)
+        stamp = [INDEX_VERSION, st.st_mtime_ns, st.st_size]
+        digest = hashlib.sha1(source.encode()).hexdigest()[:16]
+        return os.path.join(index_dir or default_index_dir(), f"{digest}.json"), stamp
+
+    @classmethod
+    def cached(cls, source, index_dir=None):
+        """Return the persisted index for a source file if it is fresh, else None."""
+        source = os.path.abspath(source)
+        path, stamp = cls._cache_location(source, index_dir)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+            if cached["source"] == source and cached["stamp"] == stamp:
+                return cls(source, cached["entries"], cached["postings"])
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        return None
+
+    @classmethod
+    def load(cls, source, index_dir=None):
+        """Return the index for a source file, rebuilding it if the file changed."""
+        source = os.path.abspath(source)
+        index = cls.cached(source, index_dir)
+        if index is not None:
+            return index
+
+        path, stamp = cls._cache_location(source, index_dir)
+        index = cls.build(source)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "source": source,
+                        "stamp": stamp,
+                        "entries": index.entries,
+                        "postings": index.postings,
+                    },
+                    f,
+                )
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+        return index
+
+    def query(self, tags=(), grep=None):
+        """
+        Return the ids of the entries having every tag and matching `grep`.
+
+        `grep` is a case-insensitive regular expression searched in the command and
+        its tags; if it isn't a valid one it is matched literally.
+        """
+        if tags:
+            ids = None
+            for tag in tags:
+                posting = set(self.postings.get(tag.lower(), ()))
+                ids = posting if ids is None else ids & posting
+            ids = sorted(ids)
+        else:
+            ids = range(len(self.entries))
+
+        if grep:
+            try:
+                pattern = re.compile(grep, re.IGNORECASE)
+            except re.error:
+                pattern = re.compile(re.escape(grep), re.IGNORECASE)
+            entries = self.entries
+            ids = [
+                i
+                for i in ids
+                if pattern.search(entries[i][COMMAND])
+                or pattern.search(entries[i][RAW_TAGS])
+            ]
+        return list(ids)
+
+    def iter_lines(self, ids):
+        """Yield the source lines of entries, read from their byte offsets."""
+        with open(self.source, "rb") as f:
+            for i in ids:
+                entry = self.entries[i]
+                f.seek(entry[OFFSET])
+                yield f.read(entry[LENGTH]).decode("utf-8", errors="replace")
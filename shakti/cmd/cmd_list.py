@@ -1,18 +1,67 @@
 import os
+import shlex
+import shutil
+import subprocess
+import sys
+from contextlib import contextmanager
 from shakti.utils import register_help
 
+DEFAULT_PAGER = "less -FRX"
+
+
+@contextmanager
+def pager(enabled=True):
+    """
+    Yield a stream for output, piped through $PAGER when writing to a terminal.
+
+    Output is written as it is produced, so the pager shows the first page right
+    away however long the list is.
+    """
+    if not enabled or not sys.stdout.isatty():
+        yield sys.stdout
+        return
+    try:
+        process = subprocess.Popen(
+            shlex.split(os.environ.get("PAGER") or DEFAULT_PAGER),
+            stdin=subprocess.PIPE,
+            text=True,
+        )
+    except OSError:
+        yield sys.stdout
+        return
+    try:
+        yield process.stdin
+    except BrokenPipeError:
+        pass  # The pager was closed before the end of the output
+    finally:
+        try:
+            process.stdin.close()
+        except BrokenPipeError:
+            pass
+        process.wait()
+
 
 @register_help("cmd list")
-def list_file(file_path):
+def list_file(file_path, tags=(), grep=None, use_pager=True):
     """
     Display the contents of curated commands file.
     You can define the file path in the config.shakti.yaml file.
 
+    Lines look like `command: <command> |tags: <tag>, <tag>`. Queries are answered
+    from an index of the file that is only rebuilt when the file changes, and
+    output is streamed through $PAGER (default `less -FRX`) on a terminal.
+
     Usage:
-        s cmd list
+        s cmd list [--tag TAG]... [--grep PATTERN] [--no-pager]
+
+    Options:
+        --tag TAG        Only commands with this tag; repeat to require several
+        --grep PATTERN   Only commands matching this case-insensitive regex
+        --no-pager       Write straight to stdout
 
     Example:
         s cmd list
+        s cmd list --tag git --grep rebase
     """
     if not file_path:
         print("Error: Please provide a file path.")
@@ -23,10 +72,26 @@ def list_file(file_path):
         return
 
     try:
-        with open(file_path, "r") as file:
-            print(f"Contents of {file_path}:")
-            print("=" * 40)
-            print(file.read())
-            print("=" * 40)
+        if not tags and not grep:
+            with open(file_path, "r") as file, pager(use_pager) as out:
+                out.write(f"Contents of {file_path}:\n")
+                out.write("=" * 40 + "\n")
+                shutil.copyfileobj(file, out)
+                out.write("\n" + "=" * 40 + "\n")
+            return
+
+        from shakti.cmd.cmd_index import CommandIndex
+
+        index = CommandIndex.load(file_path)
+        ids = index.query(tags, grep)
+        if not ids:
+            print("No matching commands.", file=sys.stderr)
+            return
+        with pager(use_pager) as out:
+            for line in index.iter_lines(ids):
+                out.write(line if line.endswith("\n") else line + "\n")
+    except BrokenPipeError:
+        # The reader (e.g. `head`) is done; don't fail flushing stdout at exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
     except IOError as e:
         print(f"Error reading file: {e}")
@@ -1,13 +1,21 @@
+import os
+import shutil
 import subprocess
+import sys
+import time
 from shakti.utils import register_help
 import shlex
 import readline
 
+SELECTORS = ("builtin", "fzf")
+# Seconds between refreshes of the built-in selector while candidates stream in
+REFRESH_INTERVAL = 0.1
+
 
 @register_help("cmd list-eval")
-def cmd_list_eval(file_path):
+def cmd_list_eval(cmd_config, selector="builtin"):
     """
-    List commands from the curated file, allow selection with fzf, and execute the selected command.
+    List commands from the curated sources, allow selection, and execute the selected command.
 
     Original command:
     selected_command=$(s cmd list | fzf | awk -F 'command: |\\|tags' '{print $2}') && vared -p "Edit and execute: " -c selected_command && eval "$selected_command"
@@ -16,17 +24,44 @@ def cmd_list_eval(file_path):
         s cmd list-eval
 
     This command will:
-    1. List available commands
-    2. Allow selection using fzf
+    1. List available commands, the ones you run most often and most recently first
+    2. Allow selection with the built-in fuzzy selector, or fzf (`--fzf`, or
+       `cmd.selector: fzf` in the config)
     3. Provide an opportunity to edit the selected command
-    4. Execute the final command
+    4. Execute the final command, and record it in the frecency log
+
+    Commands come from the `cmd` config section: the curated files `file_path` and
+    `file_paths`, the snippet files under `snippet_dir`, and, with `shell_history`,
+    your shell history. They are read concurrently, de-duplicated, and streamed
+    into the selector, so it opens before large sources are fully read.
+
+    In the built-in selector, type to filter (space-separated terms must all
+    match), move with the arrow keys or Ctrl-P/Ctrl-N, select with Enter and
+    cancel with Esc.
     """
-    # Get the list of commands
-    commands = get_commands(file_path)
+    from shakti.cmd.frecency import FrecencyLog
+    from shakti.cmd.sources import CandidateStream, configured_sources
 
-    # Use fzf for selection
-    selected_command = fzf_select(commands)
-    if not selected_command:
+    sources = configured_sources(cmd_config)
+    if not sources:
+        print(
+            f"Error: No command sources found (cmd.file_path is {cmd_config.get('file_path')!r})."
+        )
+        return
+    scores = FrecencyLog().scores()
+
+    if selector == "fzf" and not shutil.which("fzf"):
+        print("fzf not found, using the built-in selector.")
+        selector = "builtin"
+    if selector == "fzf":
+        stream = CandidateStream(sources)
+        selected_command = fzf_select(stream, scores)
+    else:
+        stream = CandidateStream(sources)
+        selected_command = fuzzy_select(stream, scores)
+    for error in stream.errors:
+        print(f"Error reading {error}")
+    if selected_command is None:
         print("No command selected.")
         return
 
@@ -37,43 +72,195 @@ def cmd_list_eval(file_path):
     execute_command(edited_command)
 
 
-def get_commands(file_path):
-    """Read commands from the specified file."""
-    commands = []
+def fuzzy_select(stream, scores):
+    """Select a command with the built-in fuzzy selector, fed from a CandidateStream."""
+    if not (sys.stdin.isatty() and sys.stdout.isatty()):
+        print("Error: the fuzzy selector needs a terminal.")
+        return None
+
+    import curses
+
+    # Make Esc cancel without curses' default one-second wait for a sequence
+    os.environ.setdefault("ESCDELAY", "25")
     try:
-        with open(file_path, "r") as file:
-            for line in file:
-                line = line.strip()
-                if line and not line.startswith("#"):
-                    parts = line.split("|")
-                    if len(parts) >= 2:
-                        command = parts[0].strip()
-                        tags = "|".join(parts[1:]).strip()
-                        commands.append(f"{command} |{tags}")
-    except IOError as e:
-        print(f"Error reading file: {e}")
-    return commands
-
-
-def fzf_select(commands):
-    """Use fzf to select a command from the list."""
+        return curses.wrapper(_selector, stream, scores)
+    except KeyboardInterrupt:
+        return None
+    except curses.error as e:
+        print(f"Error during selection: {e}")
+        return None
+
+
+def _selector(stdscr, stream, scores):
+    import curses
+    from shakti.cmd.frecency import command_key
+    from shakti.cmd.fuzzy import FuzzyIndex
+
+    commands = []
+    index = FuzzyIndex([])
+    query = ""
+    # Results by query. A query extending a cached one only searches its results,
+    # so the candidates narrow while typing and deleting is free.
+    results = {}
+    refreshed = 0
+    interval = REFRESH_INTERVAL
+    pending = False
+    selected = top = 0
+    while True:
+        # Take in the candidates streamed since the last round; refresh the results
+        # at most every `interval` while the sources are still being read
+        arrived = stream.poll()
+        if arrived:
+            commands += [command for command, _ in arrived]
+            index.extend(
+                [f"{command} |{raw_tags}" for command, raw_tags in arrived],
+                [scores.get(command_key(command), 0.0) for command, _ in arrived],
+            )
+            pending = True
+        if pending and (stream.done or time.monotonic() - refreshed >= interval):
+            started = time.monotonic()
+            results = {"": index.search("")}
+            if query:
+                results[query] = index.search(query, among=results[""])
+            refreshed = time.monotonic()
+            # Back off while searches are slow, so that typing stays responsive
+            interval = max(REFRESH_INTERVAL, 4 * (refreshed - started))
+            pending = False
+
+        if "" not in results:
+            results = {"": index.search("")}
+        if query not in results:
+            if len(results) > 64:
+                results = {"": results[""]}
+            prefix = max((q for q in results if query.startswith(q)), key=len)
+            results[query] = index.search(query, among=results[prefix])
+        matches = results[query]
+        height, width = stdscr.getmaxyx()
+        rows = max(1, height - 2)
+        selected = max(0, min(selected, len(matches) - 1))
+        top = min(max(top, selected - rows + 1), selected)
+
+        stdscr.erase()
+        stdscr.addnstr(0, 0, f"> {query}", width - 1)
+        count = f"  {len(matches)}/{len(index.candidates)}"
+        stdscr.addnstr(
+            1, 0, count + ("" if stream.done else " ..."), width - 1, curses.A_DIM
+        )
+        for row, i in enumerate(matches[top : top + rows]):
+            attr = curses.A_REVERSE if top + row == selected else 0
+            stdscr.addnstr(row + 2, 0, index.candidates[i], width - 1, attr)
+        stdscr.move(0, min(len(query) + 2, width - 1))
+        stdscr.refresh()
+
+        # Wait for a key, or just long enough to take in more candidates; then
+        # handle every key typed while the last search ran before searching again
+        stdscr.timeout(-1 if stream.done and not pending else int(interval * 1000))
+        keys = []
+        try:
+            keys.append(stdscr.get_wch())
+            stdscr.nodelay(True)
+            while True:
+                keys.append(stdscr.get_wch())
+        except curses.error:
+            pass
+
+        for key in keys:
+            if key in ("\n", "\r", curses.KEY_ENTER):
+                if query not in results:
+                    results[query] = index.search(query)
+                matches = results[query]
+                if not matches:
+                    return None
+                return commands[matches[max(0, min(selected, len(matches) - 1))]]
+            elif key in ("\x1b", "\x07", "\x04"):  # Esc, Ctrl-G, Ctrl-D
+                return None
+            elif key in (curses.KEY_UP, "\x10", "\x0b"):  # Ctrl-P, Ctrl-K
+                selected -= 1
+            elif key in (curses.KEY_DOWN, "\x0e"):  # Ctrl-N
+                selected += 1
+            elif key == curses.KEY_PPAGE:
+                selected -= rows
+            elif key == curses.KEY_NPAGE:
+                selected += rows
+            elif key in (curses.KEY_BACKSPACE, "\x7f", "\x08"):
+                query = query[:-1]
+                selected = top = 0
+            elif key == "\x15":  # Ctrl-U
+                query = ""
+                selected = top = 0
+            elif isinstance(key, str) and key.isprintable():
+                query += key
+                selected = top = 0
+
+
+def _frecency_first(stream, scores):
+    """
+    Yield the batches of a CandidateStream with the source entries of logged
+    commands first, best score first.
+
+    Candidates are held back for at most REFRESH_INTERVAL, or until every logged
+    command has turned up in a source, so fzf still opens on the first candidates
+    right away; logged commands found later come in their source's order. Logged
+    commands no source contains are left out, and the others keep their source's
+    text and tags.
+    """
+    from shakti.cmd.frecency import command_key
+
+    recent = {}
+    held = []
+    deadline = time.monotonic() + REFRESH_INTERVAL
+    while scores and len(recent) < len(scores) and not stream.done:
+        if time.monotonic() >= deadline:
+            break
+        batch = stream.poll()
+        if not batch:
+            time.sleep(0.005)
+        for command, raw_tags in batch:
+            key = command_key(command)
+            if key in scores:
+                recent[key] = (command, raw_tags)
+            else:
+                held.append((command, raw_tags))
+    yield [recent[key] for key in sorted(recent, key=scores.get, reverse=True)]
+    yield held
+    yield from stream
+
+
+def fzf_select(stream, scores=None):
+    """
+    Use fzf to select a command, writing candidates to its stdin as they stream in.
+
+    fzf has no frecency of its own: the commands in `scores` are written first,
+    best first, and `--tiebreak=index` keeps that order among equally good
+    matches. Returns the selected command, or None.
+    """
+    commands = []
     try:
         process = subprocess.Popen(
-            ["fzf"],
+            ["fzf", "--tiebreak=index", "--delimiter=\t", "--with-nth=2.."],
             stdin=subprocess.PIPE,
             stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
             text=True,
         )
-        stdout, _ = process.communicate(input="\n".join(commands))
-        if process.returncode == 0:
-            selected = stdout.strip()
-            if selected:
-                # Extract only the command part
-                command_part = selected.split("|tags")[0].strip()
-                if command_part.startswith("command: "):
-                    command_part = command_part[9:].strip()
-                return command_part
+        try:
+            for batch in _frecency_first(stream, scores or {}):
+                lines = []
+                for command, raw_tags in batch:
+                    lines.append(f"{len(commands)}\t{command} |{raw_tags}\n")
+                    commands.append(command)
+                process.stdin.write("".join(lines))
+                process.stdin.flush()
+            process.stdin.close()
+        except BrokenPipeError:
+            # fzf exited before reading everything: a selection or an abort
+            try:
+                process.stdin.close()
+            except BrokenPipeError:
+                pass
+        stdout = process.stdout.read()
+        process.wait()
+        if process.returncode == 0 and stdout.strip():
+            return commands[int(stdout.split("\t", 1)[0])]
     except Exception as e:
         print(f"Error during fzf selection: {e}")
     return None
@@ -108,7 +295,13 @@ def execute_command(command):
         # Use shlex.split to properly handle command arguments
         args = shlex.split(command)
         print(f"Executing: {command}")
-        subprocess.run(args, check=True)
+        process = subprocess.run(args)
+
+        # Runs count towards frecency whatever their exit status
+        from shakti.cmd.frecency import FrecencyLog
+
+        FrecencyLog().record(command)
+        process.check_returncode()
     except subprocess.CalledProcessError as e:
         print(f"Error executing command: {e}")
     except FileNotFoundError as e:
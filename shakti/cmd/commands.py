@@ -1,10 +1,7 @@
 import sys
-import yaml
-from os.path import expandvars, join
-from importlib import resources
-from shakti.cmd.cmd_list import list_file
-from shakti.utils import register_help, register_command
-from shakti.cmd.cmd_list_eval import cmd_list_eval
+from os.path import expandvars
+from shakti.config import get_config
+from shakti.utils import register_help, register_command, command_option
 
 
 @register_help("cmd")
@@ -34,45 +31,69 @@ def cmd(args):
     subcommand = args[0]
 
     if subcommand == "list":
-        list_command()
+        list_command(args[1:])
     elif subcommand == "list-eval":
-        list_eval_command()
+        list_eval_command(args[1:])
     else:
         print(f"Error: Unknown subcommand '{subcommand}'")
         sys.exit(1)
 
 
 @register_command("cmd list")
-def list_command():
+@command_option("--tag TAG", "Only commands with this tag (repeatable)")
+@command_option("--grep PATTERN", "Only commands matching this regex")
+@command_option("--no-pager", "Do not page the output")
+def list_command(args=()):
     """Display the contents of the curated commands file."""
-    # Get the config file path from the Shakti package
-    shakti_package = resources.files("shakti")
-    config_path = join(shakti_package, "config.shakti.yaml")
-
-    # Read the config file
-    with open(config_path, "r") as config_file:
-        config = yaml.safe_load(config_file)
+    tags = []
+    grep = None
+    use_pager = True
+    args = iter(args)
+    for arg in args:
+        option, _, value = arg.partition("=")
+        if option in ("--tag", "--grep"):
+            value = value or next(args, "")
+            if not value:
+                print(f"Error: {option} expects a value.")
+                sys.exit(1)
+            if option == "--tag":
+                tags.append(value)
+            else:
+                grep = value
+        elif arg == "--no-pager":
+            use_pager = False
+        else:
+            print(f"Error: Unknown option '{arg}'")
+            sys.exit(1)
+
+    config = get_config()
 
     # Get the file path from the config and expand environment variables
     file_path = expandvars(config["cmd"]["file_path"])
 
     # List the contents of the file
-    list_file(file_path)
-
-
-@register_command("cmd list-eval")
-def list_eval_command():
-    """Display the contents of the curated commands file."""
-    # Get the config file path from the Shakti package
-    shakti_package = resources.files("shakti")
-    config_path = join(shakti_package, "config.shakti.yaml")
+    from shakti.cmd.cmd_list import list_file
 
-    # Read the config file
-    with open(config_path, "r") as config_file:
-        config = yaml.safe_load(config_file)
+    list_file(file_path, tags, grep, use_pager)
 
-    # Get the file path from the config and expand environment variables
-    file_path = expandvars(config["cmd"]["file_path"])
 
-    # List the contents of the file
-    cmd_list_eval(file_path)
+@register_command("cmd list-eval")
+@command_option("--fzf", "Select with fzf instead of the built-in selector")
+def list_eval_command(args=()):
+    """Select a command from the curated commands file, edit it and run it."""
+    config = get_config()
+    selector = config["cmd"].get("selector", "builtin")
+    for arg in args:
+        if arg == "--fzf":
+            selector = "fzf"
+        else:
+            print(f"Error: Unknown option '{arg}'")
+            sys.exit(1)
+
+    from shakti.cmd.cmd_list_eval import SELECTORS, cmd_list_eval
+
+    if selector not in SELECTORS:
+        print(f"Error: Unknown selector '{selector}', expected one of {SELECTORS}")
+        sys.exit(1)
+    # The command sources are read from the whole cmd section
+    cmd_list_eval(config["cmd"], selector)
@@ -0,0 +1,103 @@
+import fcntl
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+# A use counts half as much after this many seconds
+HALF_LIFE = 14 * 24 * 60 * 60
+# Scores below this are dropped on compaction
+MIN_SCORE = 0.01
+# Compact once the log has this many lines more than distinct commands
+COMPACT_SLACK = 1000
+
+
+def default_log_path():
+    """Return the frecency log under $XDG_DATA_HOME (or ~/.local/share)."""
+    base = os.environ.get("XDG_DATA_HOME") or os.path.join(
+        os.path.expanduser("~"), ".local", "share"
+    )
+    return os.path.join(base, "shakti", "cmd-frecency.log")
+
+
+def command_key(command):
+    """The form commands are logged and looked up in: whitespace collapsed."""
+    return " ".join(command.split())
+
+
+def _decay(weight, timestamp, now):
+    return weight * 0.5 ** (max(0.0, now - timestamp) / HALF_LIFE)
+
+
+class FrecencyLog:
+    """
+    Executed commands, scored by how often and how recently they were run.
+
+    An append-only log of `<timestamp>\\t<weight>\\t<command>` lines: every run
+    appends a line of weight 1, and a command's score is the sum of its weights,
+    each halved every HALF_LIFE seconds. Once the log holds COMPACT_SLACK more
+    lines than commands it is compacted into one line per command, carrying its
+    decayed score as of the compaction. Appends and compaction hold an flock.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or default_log_path()
+
+    @contextmanager
+    def _locked(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path + ".lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    def _read(self):
+        """Return the parsed (timestamp, weight, command) lines of the log."""
+        lines = []
+        try:
+            with open(self.path, "r", encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    parts = line.rstrip("\n").split("\t", 2)
+                    if len(parts) != 3 or not parts[2]:
+                        continue  # A torn or foreign line
+                    try:
+                        lines.append((float(parts[0]), float(parts[1]), parts[2]))
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            pass
+        return lines
+
+    def scores(self, now=None):
+        """Return {command: score} for every command in the log."""
+        now = time.time() if now is None else now
+        scores = {}
+        for timestamp, weight, command in self._read():
+            scores[command] = scores.get(command, 0.0) + _decay(weight, timestamp, now)
+        return scores
+
+    def record(self, command, now=None):
+        """Append a run of `command`, compacting the log when it has grown."""
+        command = command_key(command)
+        if not command:
+            return
+        now = time.time() if now is None else now
+        try:
+            with self._locked():
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(f"{now:.0f}\t1\t{command}\n")
+                lines = self._read()
+                if len(lines) - len({line[2] for line in lines}) >= COMPACT_SLACK:
+                    self._compact(lines, now)
+        except OSError as e:
+            print(f"Error recording command history: {e}")
+
+    def _compact(self, lines, now):
+        scores = {}
+        for timestamp, weight, command in lines:
+            scores[command] = scores.get(command, 0.0) + _decay(weight, timestamp, now)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path))
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            for command, score in scores.items():
+                if score >= MIN_SCORE:
+                    f.write(f"{now:.0f}\t{score:.4f}\t{command}\n")
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,91 @@
+import re
+from itertools import compress
+from math import log1p
+
+# Weight of log(1 + frecency) against the match quality when ranking
+FRECENCY_WEIGHT = 4.0
+
+
+def _term_pattern(term):
+    """
+    Regex matching `term` as a subsequence, at its earliest position.
+
+    Each gap skips the characters other than the next one possessively, so a
+    failing line is rejected without backtracking.
+    """
+    parts = [re.escape(term[0])]
+    for char in term[1:]:
+        escaped = re.escape(char)
+        parts.append(f"[^{escaped}]*+{escaped}")
+    return re.compile("".join(parts))
+
+
+def _score(term, line, match):
+    start, end = match.span()
+    # A subsequence match is penalized by its gaps; a substring scores its length,
+    # plus a bonus at the start of a word
+    score = -(end - start - len(term)) - start * 0.01
+    position = start if end - start == len(term) else line.find(term)
+    if position >= 0:
+        score = len(term) - position * 0.01
+        if position == 0 or not line[position - 1].isalnum():
+            score += 2
+    return score
+
+
+class FuzzyIndex:
+    """
+    Fuzzy matching precomputed over a list of candidates.
+
+    The candidates are lowercased and their frecency boosts computed once. A
+    query then maps one compiled regex over the lines from C (`map`, `compress`),
+    and only the lines it hits are scored in Python. Queries are split on
+    whitespace into terms that must all match as subsequences, like fzf's
+    extended mode; matches rank by substring and word-start hits, compactness
+    and position, boosted by frecency.
+    """
+
+    def __init__(self, candidates, frecency=None):
+        """`frecency` holds a frecency score per candidate, in the same order."""
+        self.candidates = []
+        self.lowered = []
+        self.boost = []
+        self.extend(candidates, frecency)
+
+    def extend(self, candidates, frecency=None):
+        """Add candidates, e.g. as they stream in from their sources."""
+        self.candidates += candidates
+        self.lowered += [c.lower() for c in candidates]
+        frecency = frecency or [0.0] * len(candidates)
+        self.boost += [FRECENCY_WEIGHT * log1p(score) for score in frecency]
+
+    def by_frecency(self):
+        """All candidate ids, most frecent first, then in their original order."""
+        boost = self.boost
+        return sorted(range(len(self.candidates)), key=lambda i: -boost[i])
+
+    def search(self, query, among=None):
+        """
+        Return the ids of the candidates matching `query`, best first.
+
+        `among` restricts the search to earlier results, e.g. those of a query
+        this one extends while the user types.
+        """
+        terms = query.lower().split()
+        if not terms:
+            return self.by_frecency() if among is None else list(among)
+
+        lowered = self.lowered
+        ids = range(len(lowered)) if among is None else among
+        scores = dict.fromkeys(ids, 0.0)
+        for term in terms:
+            lines = map(lowered.__getitem__, ids)
+            matches = list(map(_term_pattern(term).search, lines))
+            scores = {
+                i: scores[i] + _score(term, lowered[i], m)
+                for i, m in zip(compress(ids, matches), filter(None, matches))
+            }
+            ids = list(scores)
+
+        boost = self.boost
+        return sorted(ids, key=lambda i: scores[i] + boost[i], reverse=True)
@@ -0,0 +1,190 @@
+import os
+import queue
+import re
+import threading
+from shakti.cmd.cmd_index import COMMAND, RAW_TAGS, CommandIndex, parse_line
+from shakti.cmd.frecency import command_key
+
+# Candidates are handed from the source threads in batches of this many
+BATCH_SIZE = 512
+# Bound on queued batches, so a fast source can't buffer far ahead of the selector
+MAX_QUEUED_BATCHES = 64
+# How a snippet line in the curated format ends: "|tags: ..."
+CURATED_TAGS = re.compile(r"\|\s*tags:")
+# Shell history files tried, in order, when HISTFILE isn't set
+HISTORY_FILES = ["~/.zsh_history", "~/.bash_history"]
+
+
+def curated_file(path):
+    """
+    Yield (command, raw_tags) from a curated commands file.
+
+    Uses the file's command index when it is fresh; otherwise the lines are parsed
+    as they are read, so large files start yielding at once.
+    """
+    index = CommandIndex.cached(path)
+    if index is not None:
+        for entry in index.entries:
+            yield entry[COMMAND], entry[RAW_TAGS]
+        return
+    with open(path, "rb") as f:
+        for raw in f:
+            parsed = parse_line(raw.decode("utf-8", errors="replace"))
+            if parsed:
+                yield parsed[0], parsed[1]
+
+
+def _is_curated(line):
+    """Whether a snippet line is in the curated format rather than a plain command."""
+    return line.startswith("command:") or CURATED_TAGS.search(line) is not None
+
+
+def snippet_dir(directory):
+    """
+    Yield (command, raw_tags) from every file under a directory of snippets.
+
+    Lines in the curated format, starting with "command:" or having a "|tags:",
+    keep their tags; any other line, pipes included, is a whole command tagged
+    "snippet" and its file's name. Blank lines and comments are skipped.
+    """
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for name in sorted(files):
+            if name.startswith("."):
+                continue
+            tags = f"tags: snippet, {os.path.splitext(name)[0]}"
+            with open(os.path.join(root, name), "rb") as f:
+                for raw in f:
+                    line = raw.decode("utf-8", errors="replace").strip()
+                    if not line or line.startswith("#"):
+                        continue
+                    parsed = _is_curated(line) and parse_line(line)
+                    yield (parsed[0], parsed[1]) if parsed else (line, tags)
+
+
+def default_history_file():
+    """Return $HISTFILE, or the first existing shell history file, or None."""
+    candidates = [os.environ.get("HISTFILE")] + HISTORY_FILES
+    for path in filter(None, candidates):
+        path = os.path.expanduser(path)
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def shell_history(path):
+    """
+    Yield (command, raw_tags) from a bash or zsh history file, most recent first.
+
+    zsh's extended `: <time>:<duration>;<command>` lines are unwrapped, and bash's
+    `#<time>` lines skipped; multi-line entries keep their first line.
+    """
+    with open(path, "rb") as f:
+        lines = f.read().decode("utf-8", errors="replace").splitlines()
+    for line in reversed(lines):
+        if line.startswith(": ") and ";" in line:
+            line = line.split(";", 1)[1]
+        line = line.strip()
+        if line and not line.startswith("#"):
+            yield line, "tags: history"
+
+
+def configured_sources(cmd_config):
+    """
+    Return the (name, generator) sources the `cmd` config section asks for.
+
+    `file_path` and `file_paths` are curated files, `snippet_dir` a snippets
+    directory, and `shell_history` is true for the shell's history file or the
+    path of one. Missing files and directories are skipped.
+    """
+
+    def expand(path):
+        return os.path.expanduser(os.path.expandvars(path))
+
+    sources = []
+    paths = [cmd_config.get("file_path")] + list(cmd_config.get("file_paths") or [])
+    for path in map(expand, filter(None, paths)):
+        if os.path.isfile(path):
+            sources.append((path, curated_file(path)))
+
+    directory = cmd_config.get("snippet_dir")
+    if directory and os.path.isdir(expand(directory)):
+        sources.append((expand(directory), snippet_dir(expand(directory))))
+
+    history = cmd_config.get("shell_history")
+    if history:
+        path = default_history_file() if history is True else expand(history)
+        if path and os.path.isfile(path):
+            sources.append((path, shell_history(path)))
+    return sources
+
+
+class CandidateStream:
+    """
+    Candidates from several sources, read concurrently and de-duplicated.
+
+    Every source runs in a daemon thread and puts batches of (command, raw_tags)
+    on a bounded queue. Iterating blocks for the next batch of new candidates
+    until all sources are exhausted; `poll` returns whatever has arrived without
+    waiting. A command is only passed on the first time it is seen, whichever
+    source it comes from. Source errors are collected in `errors`.
+    """
+
+    def __init__(self, sources, seen=()):
+        self.queue = queue.Queue(MAX_QUEUED_BATCHES)
+        self.seen = set(seen)
+        self.errors = []
+        self.running = len(sources)
+        for name, source in sources:
+            thread = threading.Thread(
+                target=self._read, args=(name, source), daemon=True
+            )
+            thread.start()
+
+    def _read(self, name, source):
+        try:
+            batch = []
+            for candidate in source:
+                batch.append(candidate)
+                if len(batch) >= BATCH_SIZE:
+                    self.queue.put(batch)
+                    batch = []
+            if batch:
+                self.queue.put(batch)
+        except (OSError, UnicodeError) as e:
+            self.errors.append(f"{name}: {e}")
+        finally:
+            self.queue.put(None)
+
+    @property
+    def done(self):
+        return self.running == 0
+
+    def _unique(self, batch):
+        if batch is None:
+            self.running -= 1
+            return []
+        seen = self.seen
+        unique = []
+        for command, raw_tags in batch:
+            key = command_key(command)
+            if key not in seen:
+                seen.add(key)
+                unique.append((command, raw_tags))
+        return unique
+
+    def poll(self):
+        """Return the new candidates that have arrived, without blocking."""
+        candidates = []
+        while not self.done:
+            try:
+                candidates += self._unique(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return candidates
+
+    def __iter__(self):
+        while not self.done:
+            batch = self._unique(self.queue.get())
+            if batch:
+                yield batch
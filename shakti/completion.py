@@ -0,0 +1,282 @@
+"""
+Shell completion for shakti: `s --complete <words>` and the scripts calling it.
+
+The completion path only imports builtin modules: it loads a precomputed table
+(subcommands, options, curated tags and programs) stored with marshal, since even
+json would pull in `re` and cost more than the lookup itself. A stale table is
+still answered from, while a detached process rebuilds it from the command
+manifest and the curated commands index.
+"""
+
+import marshal
+import os
+import sys
+import zlib
+
+# Bump when the table layout changes
+TABLE_VERSION = 2
+
+# Options of shakti itself, besides the registered ones like --slist
+SHAKTI_OPTIONS = ["--help", "--version", "--complete", "--completion-script"]
+
+# Option metavars whose values are completed, and the table entry with the values
+VALUE_SOURCES = {"TAG": "tags"}
+
+# Commands the scripts complete: the CLI, the server client, and its usual alias
+PROGRAMS = ["s", "shakti", "shakti-client"]
+
+BASH_SCRIPT = """\
+# shakti completion for bash: eval "$(shakti --completion-script bash)"
+_shakti_complete() {
+    local IFS=$'\\n'
+    COMPREPLY=($(shakti --complete "${COMP_WORDS[@]:1:COMP_CWORD}" 2>/dev/null))
+}
+complete -o default -F _shakti_complete %(programs)s
+"""
+
+ZSH_SCRIPT = """\
+# shakti completion for zsh: eval "$(shakti --completion-script zsh)"
+_shakti_complete() {
+    local -a candidates
+    candidates=("${(@f)$(shakti --complete "${(@)words[2,CURRENT]}" 2>/dev/null)}")
+    if [[ -n ${candidates[1]} ]]; then
+        compadd -a candidates
+    else
+        _files
+    fi
+}
+compdef _shakti_complete %(programs)s
+"""
+
+FISH_SCRIPT = """\
+# shakti completion for fish: shakti --completion-script fish | source
+function __shakti_complete
+    set -l tokens (commandline -opc)
+    shakti --complete $tokens[2..-1] (commandline -ct | string collect --allow-empty) 2>/dev/null
+end
+%(completes)s
+"""
+
+
+def table_path():
+    """One table per interpreter, as each sees its own plugins; under $XDG_CACHE_HOME."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    digest = zlib.crc32(sys.executable.encode())
+    return os.path.join(base, "shakti", f"completion-{digest:08x}.marshal")
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def build_table():
+    """
+    Compute the completion table from the command manifest and the curated commands.
+
+    `tree` maps a command path ("" for the top level, "git", ...) to its
+    subcommands, `options` maps it to its option specs (e.g. "--tag TAG"), and
+    `programs` holds the first words of the curated commands, which s runs as
+    system commands, offered at the top level once a word is started. `sources` are
+    the files it was computed from, with mtimes.
+
+    The curated files are those of the packaged and user configs: the table is
+    shared by every directory, so a repository's .shakti.yaml doesn't apply.
+    """
+    from os.path import expandvars
+    from shakti.cmd.cmd_index import COMMAND, CommandIndex
+    from shakti.config import config_paths, get_config
+    from shakti.manifest import load_manifest
+
+    manifest = load_manifest()
+    tree = {"": sorted(manifest["commands"])}
+    options = {"": sorted(set(manifest["options"]) | set(SHAKTI_OPTIONS))}
+    for name, info in manifest["registered"].items():
+        parts = name.split()
+        for depth in range(1, len(parts)):
+            children = tree.setdefault(" ".join(parts[:depth]), [])
+            if parts[depth] not in children:
+                children.append(parts[depth])
+        options[name] = [spec for spec, _ in info["options"]]
+
+    sources = [path for path, _ in manifest["stamp"]] + config_paths(repo=False)
+    tags = set()
+    programs = set()
+    cmd_config = get_config(repo=False).get("cmd", {})
+    paths = [cmd_config.get("file_path")] + list(cmd_config.get("file_paths") or [])
+    for path in filter(None, paths):
+        path = os.path.expanduser(expandvars(path))
+        sources.append(path)
+        try:
+            index = CommandIndex.load(path)
+        except OSError:
+            continue
+        tags.update(index.postings)
+        for entry in index.entries:
+            words = entry[COMMAND].split(None, 1)
+            if words and words[0] not in manifest["commands"]:
+                programs.add(words[0])
+
+    return {
+        "version": TABLE_VERSION,
+        "sources": [[path, _mtime(path)] for path in sources],
+        "tree": tree,
+        "options": options,
+        "tags": sorted(tags),
+        "programs": sorted(programs),
+    }
+
+
+def write_table(table):
+    """Store the table atomically; failures only cost rebuilding it next time."""
+    import tempfile
+
+    path = table_path()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "wb") as f:
+            marshal.dump(table, f)
+        os.replace(tmp_path, path)
+    except (OSError, ValueError):
+        pass
+
+
+def _rebuild_in_background():
+    devnull = os.devnull
+    try:
+        os.posix_spawn(
+            sys.executable,
+            [sys.executable, "-m", "shakti.completion", "--rebuild"],
+            os.environ,
+            file_actions=[
+                (os.POSIX_SPAWN_OPEN, 0, devnull, os.O_RDONLY, 0),
+                (os.POSIX_SPAWN_OPEN, 1, devnull, os.O_WRONLY, 0),
+                (os.POSIX_SPAWN_OPEN, 2, devnull, os.O_WRONLY, 0),
+            ],
+            setsid=True,
+        )
+    except OSError:
+        pass
+
+
+def load_table():
+    """
+    Return the completion table, building it if there is none yet.
+
+    When one of its sources changed, the stale table is returned anyway and
+    rebuilt in the background, so completion never waits on a rebuild.
+    """
+    try:
+        # loads() of the whole file: load() reads the file object by object
+        with open(table_path(), "rb") as f:
+            table = marshal.loads(f.read())
+        if table.get("version") == TABLE_VERSION:
+            if any(_mtime(path) != mtime for path, mtime in table["sources"]):
+                _rebuild_in_background()
+            return table
+    except (OSError, EOFError, ValueError, TypeError, AttributeError):
+        pass
+    table = build_table()
+    write_table(table)
+    return table
+
+
+def _takes_value(specs, option):
+    """The metavar of `option` if it takes a value (e.g. "TAG"), else None."""
+    for spec in specs:
+        name, _, metavar = spec.partition(" ")
+        if name == option:
+            return metavar or None
+    return None
+
+
+def complete(words, table):
+    """
+    Return the completions of the last of `words`, the arguments after `s`.
+
+    Positional words walk down the command tree; an option's value is completed
+    from VALUE_SOURCES when its metavar has one. Arguments outside the tree, e.g.
+    files, get no candidates, so that shells fall back to their default.
+    """
+    words = list(words) or [""]
+    current = words[-1]
+    tree, options = table["tree"], table["options"]
+
+    path = ""
+    inside = True
+    expects_value = None
+    for word in words[:-1]:
+        if word == "=":
+            continue  # bash splits "--tag=value" into "--tag", "=" and "value"
+        if expects_value:
+            expects_value = None
+        elif word.startswith("-"):
+            expects_value = _takes_value(options.get(path, ()), word)
+        elif inside:
+            child = f"{path} {word}".strip()
+            if child in tree or child in options:
+                path = child
+            else:
+                inside = False
+
+    if current.startswith("--") and "=" in current:
+        option, _, current = current.partition("=")
+        metavar = _takes_value(options.get(path, ()), option) if inside else None
+        values = table.get(VALUE_SOURCES.get(metavar), [])
+        return sorted(f"{option}={v}" for v in set(values) if v.startswith(current))
+    if expects_value:
+        candidates = table.get(VALUE_SOURCES.get(expects_value), [])
+    elif current.startswith("-"):
+        specs = options.get(path, ()) if inside else ()
+        candidates = [spec.partition(" ")[0] for spec in specs]
+    elif inside:
+        candidates = tree.get(path, [])
+        # Curated programs only once a word is started: there can be thousands
+        if path == "" and current:
+            candidates = candidates + table["programs"]
+    else:
+        candidates = []
+    return sorted({c for c in candidates if c.startswith(current)})
+
+
+def completion_script(shell):
+    """Return the completion script for a shell, or None if it isn't supported."""
+    programs = " ".join(PROGRAMS)
+    if shell == "bash":
+        return BASH_SCRIPT % {"programs": programs}
+    if shell == "zsh":
+        return ZSH_SCRIPT % {"programs": programs}
+    if shell == "fish":
+        completes = "\n".join(
+            f"complete -c {program} -a '(__shakti_complete)'" for program in PROGRAMS
+        )
+        return FISH_SCRIPT % {"completes": completes}
+    return None
+
+
+def main(args):
+    """Handle `--complete <words>` and `--completion-script <shell>`; return the exit code."""
+    option, rest = args[0], args[1:]
+    if option == "--complete":
+        candidates = complete(rest, load_table())
+        if candidates:
+            sys.stdout.write("\n".join(candidates) + "\n")
+        return 0
+    script = completion_script(rest[0] if rest else "")
+    if script is None:
+        print("Usage: shakti --completion-script bash|zsh|fish", file=sys.stderr)
+        return 1
+    sys.stdout.write(script)
+    return 0
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["--rebuild"]:
+        write_table(build_table())
+    else:
+        sys.exit(main(sys.argv[1:]))
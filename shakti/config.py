@@ -0,0 +1,177 @@
+import json
+import os
+import sys
+import tempfile
+
+CONFIG_FILE = "config.shakti.yaml"
+# Repository-local overrides, looked up from the current directory up to the repo root
+REPO_CONFIG_FILE = ".shakti.yaml"
+
+# Keys a repository's .shakti.yaml can't set, as cloning a repository shouldn't let
+# it run commands (formatters, aichat) or send diffs and API keys elsewhere, unless
+# the repository is listed in `trusted_repos` of the user config
+REPO_UNSAFE_KEYS = [
+    ("git", "add", "formatters"),
+    ("llm", "aichat", "command"),
+    ("llm", "openai", "base_url"),
+    ("llm", "openai", "api_key_env"),
+    ("trusted_repos",),
+]
+
+# Bump when the cache layout or the merging rules change
+CACHE_VERSION = 2
+
+# Merged configs, keyed by the (path, mtime, size) of their source files
+_MEMO = {}
+
+
+def _xdg_dir(variable, fallback):
+    return os.environ.get(variable) or os.path.join(os.path.expanduser("~"), fallback)
+
+
+def package_config_path():
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), CONFIG_FILE)
+
+
+def user_config_path():
+    return os.path.join(_xdg_dir("XDG_CONFIG_HOME", ".config"), "shakti", CONFIG_FILE)
+
+
+def repo_config_path(cwd=None):
+    """Return the nearest .shakti.yaml between `cwd` and its repository root, or None."""
+    directory = os.path.abspath(cwd or os.getcwd())
+    while True:
+        candidate = os.path.join(directory, REPO_CONFIG_FILE)
+        if os.path.isfile(candidate):
+            return candidate
+        parent = os.path.dirname(directory)
+        if parent == directory or os.path.exists(os.path.join(directory, ".git")):
+            return None
+        directory = parent
+
+
+def config_paths(cwd=None, repo=True):
+    """
+    The config layers in increasing precedence: package, user, and unless `repo` is
+    false, repository.
+    """
+    paths = [package_config_path(), user_config_path()]
+    repo_path = repo_config_path(cwd) if repo else None
+    if repo_path:
+        paths.append(repo_path)
+    return paths
+
+
+def _stamp(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [path, st.st_mtime_ns, st.st_size]
+
+
+def merge(base, override):
+    """Merge `override` into a copy of `base`; nested mappings are merged key by key."""
+    merged = dict(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def _drop_unsafe_keys(layer, path):
+    """Remove REPO_UNSAFE_KEYS from a repository layer, warning about each one."""
+    for keys in REPO_UNSAFE_KEYS:
+        parent = layer
+        for key in keys[:-1]:
+            parent = parent.get(key) if isinstance(parent, dict) else None
+        if isinstance(parent, dict) and keys[-1] in parent:
+            del parent[keys[-1]]
+            print(
+                f"Warning: ignoring {'.'.join(keys)} in {path}; add its repository "
+                f"to trusted_repos in {user_config_path()} to allow it",
+                file=sys.stderr,
+            )
+
+
+def _is_trusted(repo_path, config):
+    repo_dir = os.path.dirname(os.path.realpath(repo_path))
+    trusted = config.get("trusted_repos") or []
+    return any(
+        os.path.realpath(os.path.expanduser(path)) == repo_dir
+        for path in trusted
+        if isinstance(path, str)
+    )
+
+
+def _load_yaml(paths, repo_path=None):
+    import yaml
+
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    config = {}
+    for path in paths:
+        with open(path, "r") as config_file:
+            layer = yaml.load(config_file, Loader=loader)
+        if not isinstance(layer, dict):
+            continue
+        if path == repo_path and not _is_trusted(repo_path, config):
+            _drop_unsafe_keys(layer, path)
+        config = merge(config, layer)
+    return config
+
+
+def _cache_path():
+    return os.path.join(_xdg_dir("XDG_CACHE_HOME", ".cache"), "shakti", "config.json")
+
+
+def _read_cache(sources):
+    try:
+        with open(_cache_path(), "r") as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if cached.get("version") == CACHE_VERSION and cached.get("sources") == sources:
+        return cached.get("config")
+    return None
+
+
+def _write_cache(sources, config):
+    """Store the merged config; failures only cost parsing the YAML next time."""
+    path = _cache_path()
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "w") as f:
+            json.dump(
+                {"version": CACHE_VERSION, "sources": sources, "config": config}, f
+            )
+        os.replace(tmp_path, path)
+    except (OSError, TypeError, ValueError):
+        pass
+
+
+def get_config(cwd=None, repo=True):
+    """
+    Return the shakti configuration, merged from every config layer.
+
+    The packaged config.shakti.yaml is overridden by ~/.config/shakti/config.shakti.yaml
+    ($XDG_CONFIG_HOME), which is overridden by a .shakti.yaml in the current
+    repository; the repository layer can't set REPO_UNSAFE_KEYS unless the user
+    config trusts it, and is left out if `repo` is false. The merged result is memoized in-process and cached as JSON under
+    $XDG_CACHE_HOME/shakti, both keyed by the mtimes and sizes of the files, so YAML
+    is only parsed after a config file changes. Treat the result as read-only.
+    """
+    paths = config_paths(cwd, repo)
+    repo_path = paths[2] if len(paths) > 2 else None
+    sources = [stamp for stamp in map(_stamp, paths) if stamp]
+    key = tuple(tuple(stamp) for stamp in sources)
+    config = _MEMO.get(key)
+    if config is None:
+        config = _read_cache(sources)
+        if config is None:
+            config = _load_yaml([path for path, _, _ in sources], repo_path)
+            _write_cache(sources, config)
+        _MEMO[key] = config
+    return config
@@ -0,0 +1,249 @@
+"""
+A warm black daemon for `s git add`, in the spirit of blackd.
+
+The server half runs in the project's own interpreter (wherever black is installed)
+and must not import shakti, so this file only depends on the standard library and,
+on the server side, black. It listens on a Unix socket, keeps black imported,
+formats files in-process and exits after an idle timeout.
+
+The client half is used by shakti: it connects to the daemon for an interpreter,
+starting it on demand, and returns None whenever the daemon is unavailable so the
+caller can fall back to running black as a subprocess.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+# How long a client waits for a freshly started daemon to accept connections
+STARTUP_TIMEOUT = 10
+
+DEFAULT_IDLE_TIMEOUT = 15 * 60
+
+
+def socket_path(python_command):
+    """
+    Return the socket path of the daemon for an interpreter command, in shakti's
+    runtime directory (client side only: the daemon itself gets it as --socket).
+    Raises UnsafeRuntimeDir if the directory isn't safe to use.
+    """
+    from shakti.runtime import runtime_dir
+
+    digest = hashlib.sha1(" ".join(python_command).encode()).hexdigest()[:16]
+    return os.path.join(runtime_dir(create=True), f"black-{digest}.sock")
+
+
+def _connect(path, check=True):
+    # The daemon side passes check=False, as it can't import shakti
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(path)
+        if check:
+            from shakti.runtime import check_peer
+
+            check_peer(client)
+    except OSError:
+        client.close()
+        raise
+    return client
+
+
+def _start_daemon(python_command, path, idle_timeout):
+    command = python_command + [
+        os.path.abspath(__file__),
+        "--socket",
+        path,
+        "--idle-timeout",
+        str(idle_timeout),
+    ]
+    try:
+        process = subprocess.Popen(
+            command,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+    except OSError:
+        return None
+
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        try:
+            return _connect(path)
+        except OSError:
+            # The daemon exits right away if black can't be imported
+            if process.poll() is not None:
+                return None
+            time.sleep(0.05)
+    return None
+
+
+def format_files(python_command, files, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+    """
+    Format files with the daemon for `python_command`, starting it if needed.
+
+    Returns {"reformatted": [...], "unchanged": [...], "errors": {path: message}},
+    or None if the daemon is unavailable. The caller filters out the files the
+    project's exclude settings skip.
+    """
+    from shakti.runtime import UnsafeRuntimeDir
+
+    try:
+        path = socket_path(python_command)
+    except OSError as e:
+        # UnsafeRuntimeDir included, or a $XDG_RUNTIME_DIR that doesn't exist
+        print(f"Warning: not using the black daemon: {e}", file=sys.stderr)
+        return None
+    try:
+        client = _connect(path)
+    except UnsafeRuntimeDir as e:
+        print(f"Warning: not using the black daemon: {e}", file=sys.stderr)
+        return None
+    except OSError:
+        client = _start_daemon(python_command, path, idle_timeout)
+        if client is None:
+            return None
+
+    request = {"root": os.getcwd(), "files": [os.path.abspath(f) for f in files]}
+    try:
+        with client:
+            client.sendall(json.dumps(request).encode() + b"\n")
+            client.shutdown(socket.SHUT_WR)
+            chunks = []
+            while chunk := client.recv(65536):
+                chunks.append(chunk)
+        return json.loads(b"".join(chunks))
+    except (OSError, ValueError):
+        return None
+
+
+class _ProjectCache:
+    """black.Mode per project root, reloaded when its pyproject.toml changes."""
+
+    def __init__(self, black):
+        self.black = black
+        self.projects = {}
+
+    def _project(self, root):
+        """Return (pyproject stamp, black config, modes)."""
+        pyproject = os.path.join(root, "pyproject.toml")
+        try:
+            stamp = os.stat(pyproject).st_mtime_ns
+        except OSError:
+            stamp = None
+        cached = self.projects.get(root)
+        if cached is None or cached[0] != stamp:
+            config = self.black.parse_pyproject_toml(pyproject) if stamp else {}
+            cached = (stamp, config, {})
+            self.projects[root] = cached
+        return cached
+
+    def mode(self, root, is_pyi):
+        _, config, modes = self._project(root)
+        if is_pyi not in modes:
+            modes[is_pyi] = self._mode(config, is_pyi)
+        return modes[is_pyi]
+
+    def _mode(self, config, is_pyi):
+        black = self.black
+        return black.Mode(
+            target_versions={
+                black.TargetVersion[version.upper()]
+                for version in config.get("target_version", [])
+            },
+            line_length=config.get("line_length", black.DEFAULT_LINE_LENGTH),
+            is_pyi=is_pyi,
+            string_normalization=not config.get("skip_string_normalization", False),
+            magic_trailing_comma=not config.get("skip_magic_trailing_comma", False),
+            preview=config.get("preview", False),
+        )
+
+
+def _format_request(black, projects, request):
+    result = {"reformatted": [], "unchanged": [], "errors": {}}
+    for path in request["files"]:
+        try:
+            with open(path, "rb") as f:
+                contents, encoding, newline = black.decode_bytes(f.read())
+            mode = projects.mode(request["root"], path.endswith(".pyi"))
+            formatted = black.format_file_contents(contents, fast=False, mode=mode)
+        except black.NothingChanged:
+            result["unchanged"].append(path)
+            continue
+        except Exception as e:
+            result["errors"][path] = str(e) or type(e).__name__
+            continue
+        with open(path, "w", encoding=encoding, newline=newline) as f:
+            f.write(formatted)
+        result["reformatted"].append(path)
+    return result
+
+
+def serve(path, idle_timeout):
+    """Serve formatting requests on `path` until idle for `idle_timeout` seconds."""
+    import black
+
+    try:
+        _connect(path, check=False).close()
+        return  # Another daemon is already serving this socket
+    except OSError:
+        pass
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+    projects = _ProjectCache(black)
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    os.chmod(path, 0o600)
+    server.listen()
+    server.settimeout(idle_timeout)
+    try:
+        while True:
+            try:
+                conn, _ = server.accept()
+            except socket.timeout:
+                break
+            with conn:
+                conn.settimeout(None)
+                data = b""
+                while chunk := conn.recv(65536):
+                    data += chunk
+                try:
+                    response = _format_request(black, projects, json.loads(data))
+                except (ValueError, KeyError, TypeError) as e:
+                    response = {"error": str(e)}
+                try:
+                    conn.sendall(json.dumps(response).encode())
+                except OSError:
+                    pass
+    finally:
+        server.close()
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve black over a Unix socket.")
+    parser.add_argument("--socket", required=True, help="Path of the Unix socket")
+    parser.add_argument(
+        "--idle-timeout",
+        type=float,
+        default=DEFAULT_IDLE_TIMEOUT,
+        help="Seconds without requests before the daemon exits",
+    )
+    args = parser.parse_args()
+
+    try:
+        serve(args.socket, args.idle_timeout)
+    except ImportError:
+        sys.exit(1)
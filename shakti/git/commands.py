@@ -1,13 +1,7 @@
 import sys
 import subprocess
 import os
-from .git_add import git_add
-from .git_message import git_message
-from .git_diff import git_diff
-from .git_difftool import git_difftool
-from .git_tree import git_tree
-from .git_signature import git_signature
-from shakti.utils import register_help, register_command
+from shakti.utils import register_help, register_command, command_option
 
 
 @register_help("git")
@@ -21,6 +15,7 @@ def git(args):
     - s git difftool
     - s git tree
     - s git signature
+    - s git symbols
 
     For more information on any subcommand, use --help flag.
     s --help git add
@@ -49,7 +44,7 @@ def git(args):
     if subcommand == "add":
         add(git_options + subcommand_args)
     elif subcommand == "message":
-        message()
+        message(subcommand_args)
     elif subcommand == "diff":
         diff(git_options, subcommand_args)
     elif subcommand == "difftool":
@@ -58,6 +53,8 @@ def git(args):
         tree(subcommand_args)
     elif subcommand == "signature":
         signature(subcommand_args)
+    elif subcommand == "symbols":
+        symbols(subcommand_args)
     else:
         # If the subcommand is not registered, treat it as a regular git command
         command = ["git"] + git_options + [subcommand] + subcommand_args
@@ -69,32 +66,87 @@ def git(args):
 
 
 @register_command("git add")
+@command_option(
+    "--prefetch-message", "Generate the commit message in the background after adding"
+)
 def add(args):
     """Run black and then git add with given arguments."""
-    git_add(args)
+    prefetch_message = "--prefetch-message" in args
+    args = [arg for arg in args if arg != "--prefetch-message"]
+
+    from shakti.config import get_config
+
+    config = get_config()
+    git_config = config.get("git", {})
+    add_config = git_config.get("add", {})
+    prefetch_message = prefetch_message or add_config.get("prefetch_message", False)
+    # Idle timeout of the black daemon, or None to run black as a subprocess
+    black_daemon = None
+    if add_config.get("black_daemon"):
+        black_daemon = add_config.get("black_daemon_idle_timeout", 900)
+
+    from .git_add import git_add
+
+    git_add(
+        args,
+        prefetch_message=prefetch_message,
+        token_budget=git_config.get("message", {}).get("token_budget"),
+        llm_config=config.get("llm"),
+        formatters=add_config.get("formatters"),
+        black_daemon=black_daemon,
+    )
 
 
 @register_command("git message")
-def message():
+@command_option("--token-budget N", "Token budget for the staged diff (0 = no limit)")
+@command_option("--no-cache", "Generate a new message even if one is cached")
+def message(args):
     """Generate an AI commit message and output the git commit command ready for execution."""
-    git_message()
+    token_budget = None
+    use_cache = True
+    args = iter(args)
+    for arg in args:
+        if arg == "--token-budget" or arg.startswith("--token-budget="):
+            value = arg.partition("=")[2] or next(args, "")
+            if not value.isdigit():
+                print("Error: --token-budget expects a number of tokens.")
+                return
+            token_budget = int(value)
+        elif arg == "--no-cache":
+            use_cache = False
+
+    from shakti.config import get_config
+
+    config = get_config()
+    if token_budget is None:
+        token_budget = config.get("git", {}).get("message", {}).get("token_budget")
+
+    from .git_message import git_message
+
+    git_message(token_budget, config.get("llm"), use_cache)
 
 
 @register_command("git diff")
 def diff(git_options, subcommand_args):
     """Run git diff with .gitdiffignore support."""
+    from .git_diff import git_diff
+
     git_diff(git_options, subcommand_args)
 
 
 @register_command("git difftool")
 def difftool(git_options, subcommand_args):
     """Run git difftool with .gitdiffignore support."""
+    from .git_difftool import git_difftool
+
     git_difftool(git_options, subcommand_args)
 
 
 @register_command("git tree")
 def tree(subcommand_args):
     """Generate a tree-like representation of files in a Git repository."""
+    from .git_tree import git_tree
+
     git_tree(subcommand_args)
 
 
@@ -103,19 +155,68 @@ def signature(args):
     """Extract function and class signatures from Python files and folders."""
     retain_docstring = False
     retain_full_docstring = False
+    use_cache = True
+    build_index = False
+    jobs = None
+    discovery = None
+    rev = None
     paths = []
 
+    args = iter(args)
     for arg in args:
         if arg == "--retain-docstring":
             retain_docstring = True
         elif arg == "--retain-full-docstring":
             retain_full_docstring = True
+        elif arg == "--no-cache":
+            use_cache = False
+        elif arg == "--index":
+            build_index = True
+        elif arg in ("--tracked", "--staged"):
+            discovery = arg[2:]
+        elif arg == "--changed-since" or arg.startswith("--changed-since="):
+            rev = arg.partition("=")[2] or next(args, "")
+            if not rev:
+                print("Error: --changed-since expects a git revision.")
+                return
+            discovery = "changed-since"
+        elif arg == "--jobs" or arg.startswith("--jobs="):
+            value = arg.partition("=")[2] or next(args, "")
+            if not value.isdigit():
+                print("Error: --jobs expects a number of worker processes.")
+                return
+            jobs = int(value)
         else:
             paths.append(arg)
 
-    if not paths:
+    if not paths and not discovery:
         print("Error: No files or folders specified.")
         print(signature.__doc__)
         return
 
-    git_signature(paths, retain_docstring, retain_full_docstring)
+    if build_index:
+        from .git_signature import iter_signature_targets
+        from .git_symbols import update_index
+
+        update_index(iter_signature_targets(paths, discovery, rev))
+        return
+
+    from .git_signature import git_signature
+
+    git_signature(
+        paths,
+        retain_docstring,
+        retain_full_docstring,
+        use_cache,
+        jobs,
+        discovery,
+        rev,
+    )
+
+
+@register_command("git symbols")
+def symbols(args):
+    """Query the symbol index built by s git signature --index."""
+    from .git_symbols import git_symbols
+
+    git_symbols(args)
@@ -0,0 +1,160 @@
+import os
+import re
+
+# Rough token estimate for code and diffs, good enough for budgeting a prompt
+CHARS_PER_TOKEN = 4
+
+# Lines kept from the start of a hunk that is too large to include verbatim
+TRUNCATED_HUNK_LINES = 40
+
+SOURCE_EXTENSIONS = {
+    ".py", ".pyi", ".js", ".jsx", ".ts", ".tsx", ".go", ".rs", ".java", ".kt",
+    ".c", ".h", ".cc", ".cpp", ".hpp", ".cs", ".rb", ".php", ".swift", ".scala",
+    ".sh", ".sql", ".vue", ".svelte", ".css", ".scss", ".html",
+}  # fmt: skip
+DOC_CONFIG_EXTENSIONS = {
+    ".md", ".rst", ".txt", ".toml", ".yaml", ".yml", ".json", ".ini", ".cfg",
+}  # fmt: skip
+GENERATED_PATTERN = re.compile(
+    r"(?:^|/)(?:package-lock\.json|yarn\.lock|pnpm-lock\.yaml|poetry\.lock|"
+    r"Cargo\.lock|Pipfile\.lock|composer\.lock|go\.sum)$"
+    r"|\.(?:lock|min\.js|min\.css|map|snap|svg)$"
+    r"|_pb2(?:_grpc)?\.py$|\.generated\.\w+$"
+    r"|(?:^|/)(?:dist|build|vendor|node_modules)/"
+)
+
+
+def estimate_tokens(text):
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+class FileDiff:
+    """One file's section of a unified diff, split into its header and hunks."""
+
+    def __init__(self, header):
+        self.header = header
+        self.hunks = []
+        self.path = header[0].split(" b/", 1)[-1].rstrip("\n") if header else ""
+        self.added = 0
+        self.removed = 0
+
+    @property
+    def text(self):
+        return "".join(self.header) + "".join("".join(h) for h in self.hunks)
+
+    @property
+    def stat(self):
+        if not self.hunks:
+            return f"{self.path} | binary or metadata change"
+        return f"{self.path} | +{self.added} -{self.removed}"
+
+    def rank(self):
+        """Sort key: source before docs/config before the rest, generated files last."""
+        _, ext = os.path.splitext(self.path)
+        if GENERATED_PATTERN.search(self.path):
+            kind = 3
+        elif ext in SOURCE_EXTENSIONS:
+            kind = 0
+        elif ext in DOC_CONFIG_EXTENSIONS:
+            kind = 1
+        else:
+            kind = 2
+        return kind, len(self.text)
+
+
+def parse_diff(diff_text):
+    """Split `git diff` output into FileDiff objects, in diff order."""
+    files = []
+    current = None
+    for line in diff_text.splitlines(keepends=True):
+        if line.startswith("diff --git "):
+            current = FileDiff([line])
+            files.append(current)
+        elif current is None:
+            continue
+        elif line.startswith("@@"):
+            current.hunks.append([line])
+        elif current.hunks:
+            current.hunks[-1].append(line)
+            if line.startswith("+"):
+                current.added += 1
+            elif line.startswith("-"):
+                current.removed += 1
+        else:
+            current.header.append(line)
+            if line.startswith("+++ b/"):
+                current.path = line[len("+++ b/") :].rstrip("\n")
+    return files
+
+
+def truncate_hunk(hunk, max_lines=TRUNCATED_HUNK_LINES):
+    """Keep the start of an oversized hunk and note how many lines were cut."""
+    if len(hunk) <= max_lines + 1:
+        return hunk
+    kept = hunk[: max_lines + 1]
+    return kept + [f"... ({len(hunk) - len(kept)} more lines in this hunk)\n"]
+
+
+def pack_diff(diff_text, token_budget):
+    """
+    Fit a diff into a token budget.
+
+    Files are ranked by relevance: source first, then docs and config, then
+    everything else, with lockfiles and generated files last, smaller files first
+    within each group. Going down that ranking, whole files are kept verbatim
+    while they fit. Files that don't fit keep the hunks that do, with oversized
+    hunks truncated. Anything left is reduced to a `--stat`-style line. Kept files
+    stay in their original diff order.
+
+    Returns (packed_text, stats), where stats holds the tokens of the original diff,
+    tokens spent and tokens dropped, plus file counts per treatment.
+    """
+    original_tokens = estimate_tokens(diff_text)
+    stats = {
+        "original_tokens": original_tokens,
+        "spent_tokens": original_tokens,
+        "dropped_tokens": 0,
+        "verbatim": 0,
+        "truncated": 0,
+        "summarized": 0,
+    }
+    files = parse_diff(diff_text)
+    if not token_budget or original_tokens <= token_budget:
+        stats["verbatim"] = len(files)
+        return diff_text, stats
+
+    # Every file gets a stat line, so the model always sees the full change list
+    stat_block = "".join(f"{f.stat}\n" for f in files)
+    stat_header = "Changed files (diffs below may be truncated or omitted):\n"
+    remaining = token_budget - estimate_tokens(stat_header + stat_block + "\n")
+
+    packed = {}
+    for file_diff in sorted(files, key=FileDiff.rank):
+        full_tokens = estimate_tokens(file_diff.text)
+        if full_tokens <= remaining:
+            packed[id(file_diff)] = file_diff.text
+            remaining -= full_tokens
+            stats["verbatim"] += 1
+            continue
+
+        parts = []
+        cost = estimate_tokens("".join(file_diff.header))
+        for hunk in file_diff.hunks:
+            for candidate in (hunk, truncate_hunk(hunk)):
+                hunk_tokens = estimate_tokens("".join(candidate))
+                if cost + hunk_tokens <= remaining:
+                    parts.append("".join(candidate))
+                    cost += hunk_tokens
+                    break
+        if parts:
+            packed[id(file_diff)] = "".join(file_diff.header) + "".join(parts)
+            remaining -= cost
+            stats["truncated"] += 1
+        else:
+            stats["summarized"] += 1
+
+    body = "".join(packed.get(id(f), "") for f in files)
+    packed_text = f"{stat_header}{stat_block}\n{body}"
+    stats["spent_tokens"] = estimate_tokens(packed_text)
+    stats["dropped_tokens"] = max(0, original_tokens - estimate_tokens(body))
+    return packed_text, stats
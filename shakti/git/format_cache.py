@@ -0,0 +1,75 @@
+import hashlib
+import os
+import tempfile
+from shakti.git.signature_cache import blob_hash
+from shakti.git.utils import get_shakti_dir
+
+# Hashes kept per formatter; the oldest are dropped first
+MAX_ENTRIES = 20000
+
+
+def file_hash(path):
+    """Return the git blob hash of a file's contents, or None if it can't be read."""
+    try:
+        with open(path, "rb") as f:
+            return blob_hash(f.read())
+    except OSError:
+        return None
+
+
+def config_fingerprint(command, config_files):
+    """Fingerprint a formatter's command and configuration files by (mtime, size)."""
+    parts = [" ".join(command)]
+    for name in config_files:
+        try:
+            st = os.stat(name)
+            parts.append(f"{name}:{st.st_mtime_ns}:{st.st_size}")
+        except OSError:
+            parts.append(f"{name}:-")
+    return hashlib.sha1("\n".join(parts).encode()).hexdigest()
+
+
+class FormatCache:
+    """
+    Content hashes of files a formatter has already left formatted.
+
+    A file whose current content hash is in the cache would come out of the
+    formatter unchanged, so it can be skipped. Stored per repository in
+    `.git/shakti/formatted/<formatter>`, and dropped whenever the formatter's
+    command or configuration files change.
+    """
+
+    def __init__(self, name, fingerprint, cache_dir=None, max_entries=MAX_ENTRIES):
+        cache_dir = cache_dir or os.path.join(get_shakti_dir(), "formatted")
+        self.path = os.path.join(cache_dir, name)
+        self.fingerprint = fingerprint
+        self.max_entries = max_entries
+        self.hashes = {}
+        try:
+            with open(self.path, "r") as f:
+                if f.readline().strip() == fingerprint:
+                    self.hashes = dict.fromkeys(line.strip() for line in f)
+        except OSError:
+            pass
+
+    def __contains__(self, content_hash):
+        return content_hash in self.hashes
+
+    def add(self, content_hashes):
+        for content_hash in content_hashes:
+            if content_hash is not None:
+                self.hashes.pop(content_hash, None)
+                self.hashes[content_hash] = None
+
+    def save(self):
+        """Write the cache atomically; failures only cost future cache misses."""
+        hashes = list(self.hashes)[-self.max_entries :]
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path))
+            with os.fdopen(fd, "w") as f:
+                f.write(self.fingerprint + "\n")
+                f.writelines(f"{h}\n" for h in hashes)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
@@ -1,40 +1,113 @@
+import json
 import subprocess
 import os
+import shlex
+import shutil
 import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from shakti.utils import register_help
+from shakti.git.utils import compile_ignore_patterns, get_shakti_dir
+from shakti.git.format_cache import FormatCache, config_fingerprint, file_hash
+
+# Bytes of command line left for file names, well under ARG_MAX once the
+# environment is accounted for
+try:
+    ARG_BYTES = min(os.sysconf("SC_ARG_MAX") // 2, 128 * 1024)
+except (AttributeError, ValueError, OSError):
+    ARG_BYTES = 32 * 1024
+
+# `git add` options that stage all tracked changes when no pathspec is given
+WHOLE_TREE_OPTIONS = {"-A", "--all", "--no-ignore-removal", "-u", "--update"}
+UPDATE_OPTIONS = {"-u", "--update"}
+
+# Cached formatter detection, and the files whose changes invalidate it
+FORMATTER_CACHE = "formatter.json"
+DETECTION_INPUTS = [
+    "pyproject.toml",
+    "package.json",
+    os.path.join("node_modules", ".bin"),
+]
+
+# Formatters run at the same time, each working through its own files
+MAX_PARALLEL_FORMATTERS = 4
+
+PRETTIER_GLOBS = [
+    "*.js", "*.jsx", "*.mjs", "*.cjs", "*.ts", "*.tsx", "*.mts", "*.cts", "*.json",
+    "*.css", "*.scss", "*.less", "*.html", "*.vue", "*.svelte", "*.md", "*.mdx",
+    "*.yaml", "*.yml", "*.graphql",
+]  # fmt: skip
+PRETTIER_CONFIG_FILES = [
+    "package.json", ".prettierrc", ".prettierrc.json", ".prettierrc.yaml",
+    ".prettierrc.yml", ".prettierrc.js", ".prettierrc.cjs", ".prettierrc.mjs",
+    "prettier.config.js", "prettier.config.cjs", ".prettierignore", ".editorconfig",
+]  # fmt: skip
 
 
 @register_help("git add")
-def git_add(args):
+def git_add(
+    args,
+    prefetch_message=False,
+    token_budget=None,
+    llm_config=None,
+    formatters=None,
+    black_daemon=None,
+):
     """
-    Run black formatter and then git add with given arguments.
+    Run the formatters and then git add with given arguments.
 
     This command performs the following steps:
-    1. Runs the appropriate formatter on the current directory.
-    2. Adds files to the git staging area using the provided arguments.
+    1. Resolves the arguments to the modified and untracked files they cover.
+    2. Splits those files between the available formatters by their globs, and
+       runs the formatters concurrently, skipping files they already formatted in
+       a previous run.
+    3. Adds files to the git staging area using the provided arguments.
 
     Usage:
-        s git add [OPTIONS] [ARGS]...
+        s git add [--prefetch-message] [OPTIONS] [ARGS]...
+
+    Options:
+        --prefetch-message  Once the files are staged, start generating the commit
+                            message in a detached background worker, so that
+                            `s git message` can print it right away. Can be enabled
+                            permanently with git.add.prefetch_message in
+                            config.shakti.yaml.
 
     Examples:
         s git add .
         s git add file1.py file2.py
+        s git add --prefetch-message .
 
     Note:
-        - The formatter (black or prettier) is run if available
-        - If the formatter fails, the git add operation will not proceed unless confirmed
+        - black (with a pyproject.toml) and prettier (with a package.json) run if
+          available, together with the formatters defined under
+          git.add.formatters in config.shakti.yaml
+        - Each file goes to the first formatter whose globs match it; user-defined
+          formatters come first and replace a built-in one of the same name
+        - With git.add.black_daemon in config.shakti.yaml, black runs in a warm
+          daemon that stays loaded between runs, falling back to the black
+          command when the daemon can't be started
+        - If a formatter fails, the git add operation will not proceed unless confirmed
         - Any errors during formatting or 'git add' will be reported.
     """
     print("Shakti: Command found.")
-    formatter = determine_formatter()
+    available = determine_formatters(formatters)
+    if black_daemon:
+        available = [
+            {**f, "daemon_idle_timeout": black_daemon} if f["name"] == "black" else f
+            for f in available
+        ]
 
-    if formatter:
-        print(f"Running {formatter['name']}...")
+    if available:
         try:
-            subprocess.run(formatter["command"], check=True)
-            print(f"{formatter['name']} formatting complete.")
+            files = files_to_add(args)
         except subprocess.CalledProcessError as e:
-            print(f"Error running {formatter['name']}: {e}")
+            print(f"Error listing files to add: {e}", file=sys.stderr)
+            return
+        groups = split_by_formatter(files, available)
+        if not groups:
+            print("No files to format.")
+        elif not run_formatters(groups):
             if (
                 input("Do you want to proceed with git add anyway? (y/N) ").lower()
                 != "y"
@@ -49,47 +122,420 @@ def git_add(args):
         print("Files added to staging area.")
     except subprocess.CalledProcessError as e:
         print(f"Error adding files: {e}", file=sys.stderr)
+        return
 
+    if prefetch_message:
+        from shakti.git.message_cache import start_prefetch
 
-def determine_formatter():
+        if start_prefetch(token_budget, llm_config):
+            print("Generating the commit message in the background.")
+
+
+def split_add_args(args):
+    """Split `git add` arguments into (options, pathspecs)."""
+    options, pathspecs = [], []
+    after_separator = False
+    for arg in args:
+        if after_separator or not arg.startswith("-"):
+            pathspecs.append(arg)
+        elif arg == "--":
+            after_separator = True
+        else:
+            options.append(arg)
+    return options, pathspecs
+
+
+def files_to_add(args):
     """
-    Determine the appropriate formatter based on project setup.
+    Resolve `git add` arguments to the modified and untracked files they cover.
+
+    Only existing files are returned, relative to the current directory.
     """
-    if os.path.exists("pyproject.toml"):
-        if command_exists("poetry"):
-            return {"name": "black", "command": ["poetry", "run", "black", "."]}
-        elif command_exists("black"):
-            return {"name": "black", "command": ["black", "."]}
-    elif os.path.exists("package.json"):
-        if command_exists("npx") and prettier_exists():
-            return {"name": "prettier", "command": ["npx", "prettier", "--write", "."]}
+    options, pathspecs = split_add_args(args)
+    if not pathspecs:
+        if not WHOLE_TREE_OPTIONS.intersection(options):
+            return []
+        pathspecs = [":/"]
+
+    command = ["git", "ls-files", "-m", "--exclude-standard", "-z"]
+    if not UPDATE_OPTIONS.intersection(options):
+        command.append("-o")
+    output = subprocess.check_output(command + ["--"] + pathspecs)
+
+    files = []
+    # fsdecode, so names that aren't UTF-8 round-trip to the formatters and git add
+    for path in dict.fromkeys(os.fsdecode(output).split("\0")):
+        # Deleted files are listed as modified
+        if path and os.path.isfile(path):
+            files.append(path)
+    return files
+
+
+def batch_files(command, files, max_bytes=ARG_BYTES):
+    """Split files into batches whose command lines stay under max_bytes."""
+    budget = max_bytes - sum(len(arg) + 1 for arg in command)
+    batch, size = [], 0
+    for path in files:
+        length = len(os.fsencode(path)) + 1
+        if batch and size + length > budget:
+            yield batch
+            batch, size = [], 0
+        batch.append(path)
+        size += length
+    if batch:
+        yield batch
+
+
+def split_by_formatter(files, formatters):
+    """
+    Assign each file to the first formatter whose globs match it.
+
+    Globs use .gitignore syntax. Returns [(formatter, files)] for the formatters
+    that got any files, in the order given.
+    """
+    groups = [
+        (formatter, compile_ignore_patterns(tuple(formatter["globs"])).match, [])
+        for formatter in formatters
+    ]
+    for path in files:
+        for _, match, assigned in groups:
+            if match(path):
+                assigned.append(path)
+                break
+    return [(formatter, assigned) for formatter, _, assigned in groups if assigned]
 
+
+def run_formatter(formatter, files):
+    """
+    Format the given files, skipping those already formatted by a previous run.
+
+    Returns (ok, output), with the formatter's output captured so that concurrent
+    runs don't interleave.
+    """
+    name = formatter["name"]
+    cache = FormatCache(
+        name, config_fingerprint(formatter["command"], formatter["config_files"])
+    )
+    pending = [path for path in files if file_hash(path) not in cache]
+    if not pending:
+        return True, f"{name}: {len(files)} file(s) already formatted.\n"
+
+    output = [f"Running {name} on {len(pending)} file(s)...\n"]
+    if name == "black":
+        excluded = black_exclusions()
+        skipped = [path for path in pending if excluded(path)]
+        if skipped:
+            output.append(
+                f"Skipping {len(skipped)} file(s) excluded in pyproject.toml.\n"
+            )
+            pending = [path for path in pending if not excluded(path)]
+            if not pending:
+                return True, "".join(output)
+    if formatter.get("daemon_idle_timeout"):
+        daemon_output = run_black_daemon(formatter, pending, cache)
+        if daemon_output is not None:
+            ok, text = daemon_output
+            cache.save()
+            output.append(text)
+            if ok:
+                output.append(f"{name} formatting complete.\n")
+            return ok, "".join(output)
+        output.append("black daemon unavailable, running black instead.\n")
+
+    for batch in batch_files(formatter["command"], pending):
+        try:
+            result = subprocess.run(
+                formatter["command"] + batch,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                universal_newlines=True,
+            )
+        except OSError as e:
+            output.append(f"Error running {name}: {e}\n")
+            cache.save()
+            return False, "".join(output)
+        output.append(result.stdout)
+        if result.returncode:
+            output.append(f"Error running {name}: exit status {result.returncode}\n")
+            cache.save()
+            return False, "".join(output)
+        cache.add(file_hash(path) for path in batch)
+    cache.save()
+    output.append(f"{name} formatting complete.\n")
+    return True, "".join(output)
+
+
+def black_exclusions(root="."):
+    """
+    Return a function telling whether a path matches `exclude`, `extend-exclude`
+    or `force-exclude` of [tool.black] in pyproject.toml. black only applies the
+    first two to the directories it walks, not to the files it is given, like
+    here. This is the only place they are applied, for the black subprocess and
+    the daemon alike; black's default `exclude` isn't, as git already leaves out
+    what it covers unless it is tracked.
+    """
+    import re
+    import tomllib
+
+    try:
+        with open(os.path.join(root, "pyproject.toml"), "rb") as f:
+            config = tomllib.load(f).get("tool", {}).get("black", {})
+    except (OSError, ValueError):
+        config = {}
+    config = {key.replace("-", "_"): value for key, value in config.items()}
+    patterns = []
+    for pattern in [
+        config.get("exclude"),
+        config.get("extend_exclude"),
+        config.get("force_exclude"),
+    ]:
+        if not isinstance(pattern, str) or not pattern:
+            continue
+        try:
+            # Multi-line patterns are verbose, as black reads them
+            patterns.append(
+                re.compile(f"(?x){pattern}" if "\n" in pattern else pattern)
+            )
+        except re.error:
+            pass
+
+    root = os.path.abspath(root)
+
+    def excluded(path):
+        relative = os.path.relpath(os.path.abspath(path), root).replace(os.sep, "/")
+        return any(pattern.search("/" + relative) for pattern in patterns)
+
+    return excluded
+
+
+def black_python(command):
+    """Return the command for the interpreter that black's `command` runs in, or None."""
+    if command[:3] == ["poetry", "run", "black"]:
+        return ["poetry", "run", "python"]
+    executable = shutil.which(command[0])
+    if executable is None:
+        return None
+    python = os.path.join(os.path.dirname(executable), "python")
+    if os.access(python, os.X_OK):
+        return [python]
+    try:
+        with open(executable, "rb") as f:
+            shebang = f.readline().decode(errors="replace")
+    except OSError:
+        return None
+    if shebang.startswith("#!"):
+        return shebang[2:].split() or None
     return None
 
 
-def prettier_exists():
+def run_black_daemon(formatter, files, cache):
     """
-    Check if Prettier is available in the project.
+    Format files with the warm black daemon.
+
+    Returns (ok, output) like run_formatter, or None if the daemon is unavailable.
+    """
+    from shakti.git.black_daemon import format_files
+
+    python = black_python(formatter["command"])
+    if python is None:
+        return None
+    result = format_files(python, files, formatter["daemon_idle_timeout"])
+    if result is None or "errors" not in result:
+        return None
+
+    cwd = os.getcwd()
+    output = [f"reformatted {os.path.relpath(p, cwd)}\n" for p in result["reformatted"]]
+    output += [
+        f"error: cannot format {os.path.relpath(p, cwd)}: {message}\n"
+        for p, message in result["errors"].items()
+    ]
+    # Only the files black formatted or left unchanged are known to be formatted
+    cache.add(file_hash(p) for p in result["reformatted"] + result["unchanged"])
+    return not result["errors"], "".join(output)
+
+
+def run_formatters(groups, max_workers=MAX_PARALLEL_FORMATTERS):
+    """
+    Run each formatter on its files concurrently and print their output in order.
+
+    Returns False if any formatter failed.
+    """
+    names = ", ".join(f"{f['name']} ({len(files)} file(s))" for f, files in groups)
+    print(f"Formatting with {names}...")
+    workers = min(max_workers, len(groups))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda group: run_formatter(*group), groups))
+
+    ok = True
+    for success, output in results:
+        print(output, end="" if output.endswith("\n") else "\n")
+        ok = ok and success
+    return ok
+
+
+def _detection_key():
+    """Inputs that formatter detection depends on, to invalidate its cache."""
+    path_dirs = os.environ.get("PATH", "").split(os.pathsep)
+    key = [os.getcwd()]
+    for path in DETECTION_INPUTS + path_dirs:
+        try:
+            key.append([path, os.stat(path).st_mtime_ns])
+        except OSError:
+            key.append([path, None])
+    return key
+
+
+def custom_formatters(definitions):
+    """
+    Build formatters from the git.add.formatters entries of config.shakti.yaml.
+
+    Entries whose command is not installed are skipped.
+    """
+    formatters = []
+    for definition in definitions or []:
+        try:
+            name = definition["name"]
+            command = definition["command"]
+            globs = list(definition["globs"])
+        except (KeyError, TypeError):
+            print(
+                f"Ignoring formatter {definition!r}: name, command and globs are "
+                "required",
+                file=sys.stderr,
+            )
+            continue
+        if isinstance(command, str):
+            command = shlex.split(command)
+        if command and shutil.which(command[0]):
+            formatters.append(
+                {
+                    "name": name,
+                    "command": command,
+                    "globs": globs,
+                    "config_files": list(definition.get("config_files", [])),
+                }
+            )
+    return formatters
+
+
+def determine_formatters(definitions=None):
     """
+    Return the formatters available for the project, user-defined ones first.
+
+    Each command is completed with the files to format. Detecting the built-in
+    formatters is cached in `.git/shakti/formatter.json` until pyproject.toml,
+    package.json, node_modules/.bin, the directories on PATH or PATH itself change.
+    """
+    custom = custom_formatters(definitions)
+    overridden = {formatter["name"] for formatter in custom}
+    return custom + [
+        f for f in cached_builtin_formatters() if f["name"] not in overridden
+    ]
+
+
+def cached_builtin_formatters():
+    key = _detection_key()
+    cache_path = os.path.join(get_shakti_dir(), FORMATTER_CACHE)
     try:
-        subprocess.run(
-            ["npx", "--no-install", "prettier", "--version"],
-            check=True,
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-        )
-        return True
-    except subprocess.CalledProcessError:
-        return False
+        with open(cache_path) as f:
+            cached = json.load(f)
+        formatters = cached["formatters"]
+        # A cached absolute path can disappear with its virtualenv
+        if cached["key"] == key and all(
+            shutil.which(formatter["command"][0]) for formatter in formatters
+        ):
+            return formatters
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    formatters = detect_formatters()
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(cache_path))
+        with os.fdopen(fd, "w") as f:
+            json.dump({"key": key, "formatters": formatters}, f)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        pass
+    return formatters
+
+
+def run_probes(probes):
+    """Run probe commands concurrently; return {name: stdout, or None on failure}."""
+
+    def probe(command):
+        try:
+            return subprocess.run(
+                command,
+                check=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                universal_newlines=True,
+            ).stdout
+        except (subprocess.CalledProcessError, OSError):
+            return None
+
+    if not probes:
+        return {}
+    with ThreadPoolExecutor(max_workers=len(probes)) as pool:
+        futures = {name: pool.submit(probe, cmd) for name, cmd in probes.items()}
+        return {name: future.result() for name, future in futures.items()}
 
 
-def command_exists(cmd):
+def detect_formatters():
     """
-    Check if a command exists and is executable.
+    Find the built-in formatters for the project in the current directory.
+
+    Executables are looked up in-process. Only what can't be known that way runs
+    as a subprocess, concurrently: the poetry virtualenv (so black can run without
+    `poetry run`) and whether `npx` can resolve a prettier that is not installed
+    in node_modules/.bin or on PATH.
     """
-    return (
-        subprocess.call(
-            ["which", cmd], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    black_command = prettier_command = None
+    probes = {}
+
+    if os.path.exists("pyproject.toml"):
+        if shutil.which("poetry"):
+            probes["poetry"] = ["poetry", "env", "info", "--path"]
+        elif shutil.which("black"):
+            black_command = ["black"]
+
+    if os.path.exists("package.json"):
+        local_prettier = os.path.join("node_modules", ".bin", "prettier")
+        if os.access(local_prettier, os.X_OK):
+            prettier_command = [os.path.abspath(local_prettier)]
+        elif shutil.which("prettier"):
+            prettier_command = ["prettier"]
+        elif shutil.which("npx"):
+            probes["npx"] = ["npx", "--no-install", "prettier", "--version"]
+
+    results = run_probes(probes)
+    if "poetry" in probes:
+        venv = (results["poetry"] or "").strip()
+        venv_black = os.path.join(venv, "bin", "black")
+        if venv and os.access(venv_black, os.X_OK):
+            black_command = [venv_black]
+        else:
+            black_command = ["poetry", "run", "black"]
+    if results.get("npx") is not None:
+        prettier_command = ["npx", "prettier"]
+
+    formatters = []
+    if black_command:
+        formatters.append(
+            {
+                "name": "black",
+                "command": black_command,
+                "globs": ["*.py", "*.pyi"],
+                "config_files": ["pyproject.toml"],
+            }
         )
-        == 0
-    )
+    if prettier_command:
+        formatters.append(
+            {
+                "name": "prettier",
+                "command": prettier_command + ["--write", "--ignore-unknown"],
+                "globs": PRETTIER_GLOBS,
+                "config_files": PRETTIER_CONFIG_FILES,
+            }
+        )
+    return formatters
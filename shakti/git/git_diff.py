@@ -1,7 +1,7 @@
 import subprocess
 import sys
 from shakti.utils import register_help
-from shakti.git.utils import is_ignored, get_ignore_patterns
+from shakti.git.utils import get_ignore_patterns, ignore_pathspec_args
 
 
 @register_help("git diff")
@@ -15,37 +15,23 @@ def git_diff(git_options, subcommand_args):
     Usage: s git [git options] diff [options] [<commit>] [--] [<path>...]
     """
 
-    # Get the list of changed files
+    # Translate the ignore rules into exclude pathspecs for a single git diff
     try:
-        changed_files = subprocess.check_output(
-            ["git"] + ["diff", "--name-only"] + subcommand_args, universal_newlines=True
-        ).splitlines()
+        diff_args = ignore_pathspec_args(
+            subcommand_args,
+            get_ignore_patterns(),
+            ["git", "diff", "--name-only"] + subcommand_args,
+        )
     except subprocess.CalledProcessError as e:
         print(f"Error executing git diff: {e}", file=sys.stderr)
         sys.exit(e.returncode)
 
-    # Get ignore patterns
-    ignore_patterns = get_ignore_patterns()
-
-    # Filter out ignored files
-    filtered_files = [
-        file for file in changed_files if not is_ignored(file, ignore_patterns)
-    ]
-
-    if filtered_files:
-        # Run git diff with filtered files
-        try:
-            subprocess.run(
-                ["git"]
-                + git_options
-                + ["diff"]
-                + subcommand_args
-                + ["--"]
-                + filtered_files,
-                check=True,
-            )
-        except subprocess.CalledProcessError as e:
-            print(f"Error executing git diff: {e}", file=sys.stderr)
-            sys.exit(e.returncode)
-    else:
+    if diff_args is None:
         print("No changes to display after applying .gitdiffignore")
+        return
+
+    try:
+        subprocess.run(["git"] + git_options + ["diff"] + diff_args, check=True)
+    except subprocess.CalledProcessError as e:
+        print(f"Error executing git diff: {e}", file=sys.stderr)
+        sys.exit(e.returncode)
@@ -1,7 +1,7 @@
 import subprocess
 import sys
 from shakti.utils import register_help
-from shakti.git.utils import is_ignored, get_ignore_patterns
+from shakti.git.utils import get_ignore_patterns, ignore_pathspec_args
 
 
 @register_help("git difftool")
@@ -17,37 +17,23 @@ def git_difftool(git_options, subcommand_args):
     Usage: s git [git options] difftool [options] [<commit>] [--] [<path>...]
     """
 
-    # Get the list of changed files
+    # Translate the ignore rules into exclude pathspecs for a single git difftool
     try:
-        changed_files = subprocess.check_output(
-            ["git"] + ["diff", "--name-only"] + subcommand_args, universal_newlines=True
-        ).splitlines()
+        difftool_args = ignore_pathspec_args(
+            subcommand_args,
+            get_ignore_patterns(),
+            ["git", "diff", "--name-only"] + subcommand_args,
+        )
     except subprocess.CalledProcessError as e:
         print(f"Error executing git diff: {e}", file=sys.stderr)
         sys.exit(e.returncode)
 
-    # Get ignore patterns
-    ignore_patterns = get_ignore_patterns()
-
-    # Filter out ignored files
-    filtered_files = [
-        file for file in changed_files if not is_ignored(file, ignore_patterns)
-    ]
-
-    if filtered_files:
-        # Run git difftool with filtered files
-        try:
-            subprocess.run(
-                ["git"]
-                + git_options
-                + ["difftool"]
-                + subcommand_args
-                + ["--"]
-                + filtered_files,
-                check=True,
-            )
-        except subprocess.CalledProcessError as e:
-            print(f"Error executing git difftool: {e}", file=sys.stderr)
-            sys.exit(e.returncode)
-    else:
+    if difftool_args is None:
         print("No changes to display after applying .gitdiffignore")
+        return
+
+    try:
+        subprocess.run(["git"] + git_options + ["difftool"] + difftool_args, check=True)
+    except subprocess.CalledProcessError as e:
+        print(f"Error executing git difftool: {e}", file=sys.stderr)
+        sys.exit(e.returncode)
@@ -1,77 +1,189 @@
+import asyncio
 import subprocess
 import shlex
 import sys
 from shakti.utils import register_help
-from shakti.git.utils import is_ignored, get_ignore_patterns
+from shakti.git.utils import get_ignore_patterns, ignore_pathspec_args
+from shakti.git.diff_packer import pack_diff
+from shakti.git.message_cache import MessageCache, message_key, staged_tree
+from shakti.llm import LLMError, get_backend
+
+PROMPT_TEMPLATE = (
+    "Give commit message for the following changes, follow Conventional Commit "
+    "guidelines. \n\nHere are examples of couple of commit messages for your "
+    "reference: \nExample one and two:\n\n{log}\n\n\nAnd now here are the diffs: \n"
+    "{diff}"
+)
+
+
+async def run_git(args, check=True):
+    """
+    Run a git command asynchronously and return its stdout. Diffs of files that
+    aren't UTF-8 get U+FFFD for the bytes that don't decode.
+    """
+    process = await asyncio.create_subprocess_exec(
+        "git",
+        *args,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    stdout, stderr = await process.communicate()
+    if check and process.returncode:
+        raise subprocess.CalledProcessError(
+            process.returncode, ["git"] + args, stdout, stderr
+        )
+    return stdout.decode(errors="replace")
+
+
+async def collect_commit_context(diff_args):
+    """Gather the recent log, the staged file names and the staged diff concurrently."""
+    return await asyncio.gather(
+        # A repository without commits has no log; that only costs the examples
+        run_git(["--no-pager", "log", "-2", "--pretty=format:%B"], check=False),
+        run_git(["diff", "--name-only"] + diff_args),
+        run_git(["--no-pager", "diff"] + diff_args),
+    )
+
+
+def build_prompt(log, diff):
+    return PROMPT_TEMPLATE.format(log=log, diff=diff)
+
+
+def prepare_prompt(token_budget=None):
+    """
+    Collect the staged changes and pack them into the commit message prompt.
+
+    Returns (prompt, stats), or (None, None) if nothing is staged once .gitdiffignore
+    is applied. Raises CalledProcessError if git fails.
+    """
+    # Translate the ignore rules into exclude pathspecs for the staged diff
+    diff_args = ignore_pathspec_args(
+        ["--staged"],
+        get_ignore_patterns(),
+        ["git", "diff", "--staged", "--name-only"],
+    )
+    if diff_args is None:
+        return None, None
+    log, staged_names, diff_text = asyncio.run(collect_commit_context(diff_args))
+    if not staged_names.strip():
+        return None, None
+
+    # Fit the diff into the token budget
+    packed_diff, stats = pack_diff(diff_text, token_budget)
+    return build_prompt(log, packed_diff), stats
+
+
+def _write_stdout(text):
+    sys.stdout.write(text)
+    sys.stdout.flush()
+
+
+def _print_commit_command(message):
+    # Escape the commit message for shell
+    escaped_message = shlex.quote(message)
+
+    # Output the git commit command directly
+    print("\n\nCommit command:\n\n")
+    print(f"git commit -m {escaped_message}", end="")
 
 
 @register_help("git message")
-def git_message():
+def git_message(token_budget=None, llm_config=None, use_cache=True):
     """
     Generate an AI commit message and output the git commit command ready for execution.
 
     This function performs the following steps:
     1. Retrieves the last two commit messages from the git log.
     2. Gets the staged changes using git diff.
-    3. Sends this information to an AI model to generate a commit message.
-    4. Displays the AI-generated commit message.
-    5. Outputs a git commit command with the generated message, ready for execution.
+    3. Packs the diff into the token budget, keeping the most relevant files and
+       hunks verbatim and reducing the rest to truncated hunks or stat lines.
+    4. Sends this information to an AI model to generate a commit message.
+    5. Displays the AI-generated commit message.
+    6. Outputs a git commit command with the generated message, ready for execution.
 
     Usage:
         This function is typically called by a CLI command, e.g., 's git message'
+        s git message [--token-budget N] [--no-cache]
+
+    The budget defaults to git.message.token_budget in config.shakti.yaml;
+    0 sends the whole diff. The model backend is chosen by the `llm` section of
+    config.shakti.yaml: the aichat CLI, or the built-in client for
+    OpenAI-compatible HTTP APIs.
+
+    Messages are cached under the tree hash of the staged index, the token budget,
+    the llm config and the .gitdiffignore rules, so running the command again on the
+    same index with the same settings is instant. `s git add --prefetch-message`
+    generates the message in the background; if that job is still running, this
+    command waits for it instead of calling the model again. --no-cache always
+    generates a new message, without reading or writing the cache.
 
     Note:
-        - The function uses 'aichat' to generate the commit message.
+        - The function uses 'aichat' by default to generate the commit message.
         - It follows Conventional Commit guidelines.
+        - The git log, staged files and diff are collected concurrently, and the
+          message is streamed to the terminal as the model produces it.
         - If there's an error generating the message, it will be reported to stderr.
         - The commit message is properly escaped for shell use.
 
     Returns:
         None. The function prints the results to stdout.
     """
+    # --no-cache skips the cache entirely: no git write-tree, no cache directory
+    key = message_key(staged_tree(), token_budget, llm_config) if use_cache else None
+
+    if key is not None:
+        cache = MessageCache()
+        ai_commit_message = cache.get(key)
+        if ai_commit_message is None and cache.in_flight(key):
+            print(
+                "Waiting for the message being generated in the background...",
+                file=sys.stderr,
+            )
+            ai_commit_message = cache.wait(key)
+        if ai_commit_message is not None:
+            print(
+                "Using the cached message for this index (--no-cache to regenerate)",
+                file=sys.stderr,
+            )
+            print("AI Commit Message:\n\n")
+            print(ai_commit_message)
+            _print_commit_command(ai_commit_message)
+            return
 
-    # Get the list of staged files
     try:
-        staged_files = subprocess.check_output(
-            ["git", "diff", "--staged", "--name-only"], universal_newlines=True
-        ).splitlines()
+        prompt, stats = prepare_prompt(token_budget)
     except subprocess.CalledProcessError as e:
-        print(f"Error getting staged files: {e}", file=sys.stderr)
+        print(f"Error getting staged changes: {e}", file=sys.stderr)
         return
 
-    # Get ignore patterns
-    ignore_patterns = get_ignore_patterns()
-
-    # Filter out ignored files
-    filtered_files = [
-        file for file in staged_files if not is_ignored(file, ignore_patterns)
-    ]
-
-    if not filtered_files:
+    if prompt is None:
         print("No changes to commit after applying .gitdiffignore", file=sys.stderr)
         return
 
-    # Generate AI commit message
-    ai_commit_command = [
-        "bash",
-        "-c",
-        f"""{{ echo "Give commit message for the following changes, follow Conventional Commit guidelines. \n\nHere are examples of couple of commit messages for your reference: \nExample one and two:\n" ; git --no-pager log -2 --pretty=format:"%B"; echo "\n\nAnd now here are the diffs: "; git --no-pager diff --staged -- {' '.join(shlex.quote(f) for f in filtered_files)}; }} | aichat""",
-    ]
+    print(
+        f"Diff: ~{stats['spent_tokens']} tokens spent, ~{stats['dropped_tokens']} "
+        f"dropped (budget {token_budget or 'unlimited'}; {stats['verbatim']} files "
+        f"verbatim, {stats['truncated']} truncated, {stats['summarized']} summarized)",
+        file=sys.stderr,
+    )
 
+    # Generate AI commit message, streaming it as it arrives
+    print("AI Commit Message:\n\n")
     try:
-        ai_commit_message = subprocess.check_output(
-            ai_commit_command, text=True, stderr=subprocess.PIPE
-        ).strip()
-        print("AI Commit Message:\n\n")
-        print(ai_commit_message)
-    except subprocess.CalledProcessError as e:
-        print(f"Error generating AI commit message: {e}", file=sys.stderr)
-        print(f"Error output: {e.stderr.decode()}", file=sys.stderr)
+        backend = get_backend(llm_config)
+        ai_commit_message = backend.stream(prompt, _write_stdout)
+    except LLMError as e:
+        print(f"\nError generating AI commit message: {e}", file=sys.stderr)
+        if e.details:
+            print(f"Error output: {e.details}", file=sys.stderr)
         return
 
-    # Escape the commit message for shell
-    escaped_message = shlex.quote(ai_commit_message)
+    if not ai_commit_message.endswith("\n"):
+        print()
+    ai_commit_message = ai_commit_message.strip()
 
-    # Output the git commit command directly
-    print("\n\nCommit command:\n\n")
-    print(f"git commit -m {escaped_message}", end="")
+    if key is not None and ai_commit_message:
+        cache.put(key, ai_commit_message)
+        cache.evict()
+
+    _print_commit_command(ai_commit_message)
@@ -2,8 +2,13 @@ import ast
 import astor
 import argparse
 import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 from shakti.utils import register_help
-from shakti.git.utils import is_ignored, get_ignore_patterns  # Add this import
+from shakti.git.utils import get_ignore_patterns
+from shakti.git.signature_cache import SignatureCache
 
 
 class SignatureExtractor(ast.NodeVisitor):
@@ -92,56 +97,215 @@ class SignatureExtractor(ast.NodeVisitor):
         self.new_tree.body.append(new_node)
 
 
-@register_help("git signature")
-def git_signature(paths, retain_docstring=False, retain_full_docstring=False):
-    """Extract function and class signatures from Python files and folders.
+def render_signature(source, retain_docstring, retain_full_docstring):
+    """Return the signature-only source code for a Python module."""
+    tree = ast.parse(source)
+    extractor = SignatureExtractor(retain_docstring, retain_full_docstring)
+    extractor.visit(tree)
+    return astor.to_source(extractor.new_tree)
 
-    Usage: s git signature [--retain-docstring] [--retain-full-docstring] <path1> <path2> ...
 
-    Paths can be individual Python files or folders containing Python files.
-    Non-Python files will be skipped.
-    Files and folders specified in .gitdiffignore will be ignored.
-    """
-    # Get ignore patterns
-    ignore_patterns = get_ignore_patterns()
-
-    def process_file(file_path):
-        # Check if the file should be ignored
-        if is_ignored(file_path, ignore_patterns):
-            print(f"Skipping {file_path}: Ignored by .gitdiffignore")
-            return
-
-        _, ext = os.path.splitext(file_path)
-        if ext.lower() != ".py":
-            print(
-                f"Skipping {file_path}: Only Python (.py) files are currently supported."
+def signature_for_file(
+    file_path, ignore_patterns, retain_docstring, retain_full_docstring, cache=None
+):
+    """Return the text `s git signature` prints for a single file."""
+    # Check if the file should be ignored
+    relative_path = (
+        os.path.relpath(file_path) if os.path.isabs(file_path) else file_path
+    )
+    if ignore_patterns.match(relative_path):
+        return f"Skipping {file_path}: Ignored by .gitdiffignore\n"
+
+    _, ext = os.path.splitext(file_path)
+    if ext.lower() != ".py":
+        return (
+            f"Skipping {file_path}: Only Python (.py) files are currently supported.\n"
+        )
+
+    output = []
+    try:
+        with open(file_path, "rb") as file:
+            source = file.read()
+        source_code = source.decode()
+        output.append("=" * 100 + "\n")
+        output.append(f"Signature for file: {file_path}\n")
+        transformed_code = None
+        if cache:
+            key = cache.key(source, retain_docstring, retain_full_docstring)
+            transformed_code = cache.get(key)
+        if transformed_code is None:
+            transformed_code = render_signature(
+                source_code, retain_docstring, retain_full_docstring
             )
-            return
+            if cache:
+                cache.put(key, transformed_code)
+        output.append(transformed_code + "\n")
+    except Exception as e:
+        output.append(f"Error processing {file_path}: {e}\n")
+    return "".join(output)
+
 
+def git_discovery_command(discovery, rev=None):
+    """Return the git command listing Python files for a discovery mode."""
+    if discovery == "tracked":
+        return ["git", "ls-files", "-z"]
+    # --relative keeps paths relative to (and within) the current directory
+    command = ["git", "diff", "--name-only", "-z", "--relative", "--diff-filter=d"]
+    if discovery == "staged":
+        return command + ["--cached"]
+    if discovery == "changed-since":
+        return command + [rev, "--"]
+    raise ValueError(f"Unknown discovery mode: {discovery}")
+
+
+def iter_signature_targets(paths, discovery=None, rev=None):
+    """
+    Yield files to process in walk order, or (path, error message) for bad paths.
+
+    With a discovery mode ("tracked", "staged" or "changed-since" a revision), files
+    come from git instead of walking the filesystem, so untracked files, virtualenvs
+    and build output are never visited.
+    """
+    if discovery:
+        command = git_discovery_command(discovery, rev)
+        if "--" not in command:
+            command.append("--")
         try:
-            with open(file_path, "r") as file:
-                source_code = file.read()
-            print("=" * 100)
-            print(f"Signature for file: {file_path}")
-            tree = ast.parse(source_code)
-            extractor = SignatureExtractor(retain_docstring, retain_full_docstring)
-            extractor.visit(tree)
-            transformed_code = astor.to_source(extractor.new_tree)
-            print(transformed_code)
-        except Exception as e:
-            print(f"Error processing {file_path}: {e}")
+            output = subprocess.check_output(command + (paths or ["."]))
+        except subprocess.CalledProcessError as e:
+            print(f"Error listing files with git: {e}", file=sys.stderr)
+            sys.exit(e.returncode)
+        for file_path in os.fsdecode(output).split("\0"):
+            if file_path.endswith(".py"):
+                yield file_path
+        return
 
     for path in paths:
         if os.path.isfile(path):
-            process_file(path)
+            yield path
         elif os.path.isdir(path):
             for root, _, files in os.walk(path):
                 for file in files:
                     if file.endswith(".py"):
-                        file_path = os.path.join(root, file)
-                        process_file(file_path)
+                        yield os.path.join(root, file)
         else:
-            print(f"Error: {path} is not a valid file or directory.")
+            yield (path, f"Error: {path} is not a valid file or directory.\n")
+
+
+# Per-process state of pool workers, set up once by _init_worker
+_worker_state = {}
+
+
+def _init_worker(retain_docstring, retain_full_docstring, use_cache):
+    _worker_state["ignore_patterns"] = get_ignore_patterns()
+    _worker_state["cache"] = SignatureCache() if use_cache else None
+    _worker_state["options"] = (retain_docstring, retain_full_docstring)
+
+
+def _render_batch(targets):
+    """Render a batch of targets in a worker; returns (texts, cache bytes written)."""
+    cache = _worker_state["cache"]
+    written_before = cache.bytes_written if cache else 0
+    texts = [
+        (
+            target[1]
+            if isinstance(target, tuple)
+            else signature_for_file(
+                target,
+                _worker_state["ignore_patterns"],
+                *_worker_state["options"],
+                cache=cache,
+            )
+        )
+        for target in targets
+    ]
+    return texts, (cache.bytes_written if cache else 0) - written_before
+
+
+@register_help("git signature")
+def git_signature(
+    paths,
+    retain_docstring=False,
+    retain_full_docstring=False,
+    use_cache=True,
+    jobs=None,
+    discovery=None,
+    rev=None,
+):
+    """Extract function and class signatures from Python files and folders.
+
+    Usage: s git signature [--retain-docstring] [--retain-full-docstring] [--no-cache] [--jobs N] [--index]
+                            [--tracked | --staged | --changed-since <rev>] <path1> <path2> ...
+
+    Paths can be individual Python files or folders containing Python files.
+    Non-Python files will be skipped.
+    Files and folders specified in .gitdiffignore will be ignored.
+
+    Rendered signatures are cached by file content under $XDG_CACHE_HOME/shakti,
+    so repeat runs only parse modified files. Use --no-cache to bypass the cache.
+
+    --tracked, --staged and --changed-since <rev> take the Python files from git
+    (`git ls-files` or `git diff --name-only`) instead of walking the paths, which
+    then default to the current directory. Cost is proportional to the diff, so
+    `--changed-since main` covers what you touched on a branch.
+
+    --index stores a queryable symbol table instead of printing signatures; see
+    `s --help git symbols`.
+
+    --jobs N extracts signatures in N worker processes (0 = one per CPU). Output is
+    identical to the serial mode, and the throughput is reported on stderr.
+    """
+    start_time = time.perf_counter()
+    cache = SignatureCache() if use_cache else None
+    processed = 0
+
+    if jobs is None or jobs == 1:
+        ignore_patterns = get_ignore_patterns()
+        for target in iter_signature_targets(paths, discovery, rev):
+            if isinstance(target, tuple):
+                sys.stdout.write(target[1])
+                continue
+            sys.stdout.write(
+                signature_for_file(
+                    target,
+                    ignore_patterns,
+                    retain_docstring,
+                    retain_full_docstring,
+                    cache=cache,
+                )
+            )
+            processed += 1
+    else:
+        jobs = jobs or os.cpu_count() or 1
+        targets = list(iter_signature_targets(paths, discovery, rev))
+        # Hand out several files per task to amortize pickling, while keeping
+        # enough tasks for the workers to stay balanced.
+        batch_size = max(1, min(64, len(targets) // (jobs * 4)))
+        batches = [
+            targets[i : i + batch_size] for i in range(0, len(targets), batch_size)
+        ]
+        with ProcessPoolExecutor(
+            max_workers=jobs,
+            initializer=_init_worker,
+            initargs=(retain_docstring, retain_full_docstring, use_cache),
+        ) as executor:
+            # map() yields results in submission order, so output matches the walk
+            for texts, bytes_written in executor.map(_render_batch, batches):
+                sys.stdout.write("".join(texts))
+                if cache:
+                    cache.bytes_written += bytes_written
+        processed = sum(1 for target in targets if not isinstance(target, tuple))
+
+    if cache:
+        cache.evict()
+
+    if jobs is not None:
+        elapsed = time.perf_counter() - start_time
+        print(
+            f"Processed {processed} files in {elapsed:.2f}s "
+            f"({processed / elapsed if elapsed else 0:.1f} files/s, {jobs} jobs)",
+            file=sys.stderr,
+        )
 
 
 if __name__ == "__main__":
@@ -152,7 +316,7 @@ if __name__ == "__main__":
         "paths",
         metavar="PATH",
         type=str,
-        nargs="+",
+        nargs="*",
         help="Python files or folders to analyze",
     )
     parser.add_argument(
@@ -165,6 +329,45 @@ if __name__ == "__main__":
         action="store_true",
         help="Retain full docstrings (overrides --retain-docstring)",
     )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of worker processes (0 = one per CPU)",
+    )
+    discovery = parser.add_mutually_exclusive_group()
+    discovery.add_argument(
+        "--tracked",
+        dest="discovery",
+        action="store_const",
+        const="tracked",
+        help="Only process files tracked by git",
+    )
+    discovery.add_argument(
+        "--staged",
+        dest="discovery",
+        action="store_const",
+        const="staged",
+        help="Only process files with staged changes",
+    )
+    discovery.add_argument(
+        "--changed-since",
+        metavar="REV",
+        help="Only process files changed since the given revision",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not read or write the signature cache",
+    )
     args = parser.parse_args()
 
-    git_signature(args.paths, args.retain_docstring, args.retain_full_docstring)
+    git_signature(
+        args.paths,
+        args.retain_docstring,
+        args.retain_full_docstring,
+        use_cache=not args.no_cache,
+        jobs=args.jobs,
+        discovery="changed-since" if args.changed_since else args.discovery,
+        rev=args.changed_since,
+    )
@@ -0,0 +1,223 @@
+import ast
+import os
+import sqlite3
+import sys
+from shakti.utils import register_help
+from shakti.git.utils import get_ignore_patterns, get_repo_root, get_shakti_dir
+from shakti.git.signature_cache import blob_hash
+
+INDEX_FILE = "symbols.sqlite3"
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    blob TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS symbols (
+    path TEXT NOT NULL,
+    qualname TEXT NOT NULL,
+    name TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    lineno INTEGER NOT NULL,
+    end_lineno INTEGER NOT NULL,
+    args TEXT,
+    decorators TEXT NOT NULL,
+    doc TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS symbols_name ON symbols (name);
+CREATE INDEX IF NOT EXISTS symbols_path ON symbols (path);
+"""
+
+
+class SymbolCollector(ast.NodeVisitor):
+    """
+    Collect symbol table rows for the definitions SignatureExtractor keeps.
+
+    That is module-level functions and classes, and the methods of those classes.
+    """
+
+    def __init__(self):
+        self.symbols = []
+        self.class_name = None
+
+    def _add(self, node, kind, args=None):
+        qualname = f"{self.class_name}.{node.name}" if self.class_name else node.name
+        doc = ast.get_docstring(node) or ""
+        self.symbols.append(
+            (
+                qualname,
+                node.name,
+                kind,
+                node.lineno,
+                node.end_lineno or node.lineno,
+                args,
+                " ".join(f"@{ast.unparse(d)}" for d in node.decorator_list),
+                doc.strip().split("\n")[0],
+            )
+        )
+
+    def visit_FunctionDef(self, node):
+        kind = "method" if self.class_name else "function"
+        self._add(node, kind, ast.unparse(node.args))
+
+    def visit_AsyncFunctionDef(self, node):
+        kind = "async method" if self.class_name else "async function"
+        self._add(node, kind, ast.unparse(node.args))
+
+    def visit_ClassDef(self, node):
+        bases = [ast.unparse(b) for b in node.bases + node.keywords]
+        self._add(node, "class", ", ".join(bases) or None)
+        self.class_name = node.name
+        for item in node.body:
+            if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                self.visit(item)
+        self.class_name = None
+
+
+def collect_symbols(source):
+    """Parse Python source and return its symbol rows."""
+    collector = SymbolCollector()
+    collector.visit(ast.parse(source))
+    return collector.symbols
+
+
+def open_index(create=True):
+    """Open the repository's symbol index, or return None if it does not exist."""
+    path = os.path.join(get_shakti_dir(), INDEX_FILE)
+    if not create and not os.path.exists(path):
+        return None
+    conn = sqlite3.connect(path)
+    if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+        conn.executescript(
+            "DROP TABLE IF EXISTS files; DROP TABLE IF EXISTS symbols;"
+            + SCHEMA
+            + f"PRAGMA user_version = {SCHEMA_VERSION};"
+        )
+    return conn
+
+
+def update_index(targets):
+    """
+    Bring the symbol index up to date for the given files.
+
+    Only files whose blob hash changed since the last run are parsed. Indexed files
+    that no longer exist are dropped. Paths are stored relative to the repository root.
+    """
+    root = get_repo_root() or os.getcwd()
+    ignore_patterns = get_ignore_patterns()
+    conn = open_index()
+    known = dict(conn.execute("SELECT path, blob FROM files"))
+    updated = unchanged = 0
+
+    with conn:
+        for target in targets:
+            if isinstance(target, tuple):
+                sys.stdout.write(target[1])
+                continue
+            if not target.endswith(".py"):
+                continue
+            relative_path = os.path.relpath(target) if os.path.isabs(target) else target
+            if ignore_patterns.match(relative_path):
+                continue
+
+            path = os.path.relpath(os.path.abspath(target), root)
+            try:
+                with open(target, "rb") as file:
+                    source = file.read()
+                blob = blob_hash(source)
+                if known.get(path) == blob:
+                    unchanged += 1
+                    continue
+                symbols = collect_symbols(source)
+            except Exception as e:
+                print(f"Error processing {target}: {e}")
+                continue
+
+            conn.execute("DELETE FROM symbols WHERE path = ?", (path,))
+            conn.executemany(
+                "INSERT INTO symbols VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(path,) + row for row in symbols],
+            )
+            conn.execute("INSERT OR REPLACE INTO files VALUES (?, ?)", (path, blob))
+            known[path] = blob
+            updated += 1
+
+        removed = [p for p in known if not os.path.exists(os.path.join(root, p))]
+        conn.executemany("DELETE FROM symbols WHERE path = ?", [(p,) for p in removed])
+        conn.executemany("DELETE FROM files WHERE path = ?", [(p,) for p in removed])
+
+    total = conn.execute("SELECT COUNT(*) FROM symbols").fetchone()[0]
+    conn.close()
+    print(
+        f"Symbol index: {updated} files updated, {unchanged} unchanged, "
+        f"{len(removed)} removed, {total} symbols."
+    )
+
+
+@register_help("git symbols")
+def git_symbols(args):
+    """
+    Query the symbol index built by `s git signature --index`.
+
+    Usage: s git symbols [--kind KIND] <pattern>
+
+    The pattern is matched against symbol names and qualified names (Class.method).
+    Patterns with *, ? or [ are globs; anything else is a case-insensitive substring.
+    KIND is one of: function, async function, class, method, async method.
+
+    Examples:
+        s git symbols parse
+        s git symbols 'Signature*.visit_*' --kind method
+    """
+    kind = None
+    patterns = []
+    args = iter(args)
+    for arg in args:
+        if arg == "--kind":
+            kind = next(args, None)
+        elif arg.startswith("--kind="):
+            kind = arg.partition("=")[2]
+        else:
+            patterns.append(arg)
+
+    if len(patterns) != 1:
+        print(git_symbols.__doc__)
+        return
+
+    conn = open_index(create=False)
+    if conn is None:
+        print(
+            "No symbol index found. Build one with: s git signature --index <paths>",
+            file=sys.stderr,
+        )
+        sys.exit(1)
+
+    pattern = patterns[0]
+    if any(c in pattern for c in "*?["):
+        where = "(qualname GLOB ? OR name GLOB ?)"
+        params = [pattern, pattern]
+    else:
+        escaped = pattern.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        where = "qualname LIKE ? ESCAPE '\\'"
+        params = [f"%{escaped}%"]
+    if kind:
+        where += " AND kind = ?"
+        params.append(kind)
+
+    rows = conn.execute(
+        "SELECT path, lineno, kind, qualname, args, decorators, doc FROM symbols "
+        f"WHERE {where} ORDER BY path, lineno",
+        params,
+    )
+    root = get_repo_root() or os.getcwd()
+    for path, lineno, kind, qualname, args, decorators, doc in rows:
+        display_path = os.path.relpath(os.path.join(root, path))
+        signature = f"{qualname}({args})" if args is not None else qualname
+        line = f"{display_path}:{lineno}  {kind:<14} {signature}"
+        if decorators:
+            line += f"  {decorators}"
+        if doc:
+            line += f"  # {doc}"
+        print(line)
+    conn.close()
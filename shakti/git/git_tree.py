@@ -1,39 +1,151 @@
 import subprocess
 import sys
-from pathlib import Path
-from shakti.git.utils import is_ignored, get_ignore_patterns
+from shakti.git.utils import get_ignore_patterns
 from shakti.utils import register_help
 
 
-def build_tree(files):
-    """Construct a nested dictionary representing the file tree structure."""
-    tree = {}
-    for file_path in files:
-        parts = file_path.split("/")
-        current = tree
-        for part in parts[:-1]:
-            if part not in current:
-                current[part] = {}
-            current = current[part]
-        current[parts[-1]] = None
-    return tree
-
-
-def print_tree(tree, prefix="", use_markdown=True):
-    """Print the file tree structure."""
-    items = list(tree.items())
-    for i, (name, subtree) in enumerate(items):
-        is_last_item = i == len(items) - 1
-        if use_markdown:
-            print(f"{prefix}- {name}")
-            new_prefix = f"{prefix}  "
+def iter_ls_tree(command, chunk_size=64 * 1024):
+    """Yield the NUL-separated paths printed by `command` as they arrive."""
+    process = subprocess.Popen(command, stdout=subprocess.PIPE)
+    pending = b""
+    try:
+        while True:
+            chunk = process.stdout.read1(chunk_size)
+            if not chunk:
+                break
+            *paths, pending = (pending + chunk).split(b"\0")
+            for path in paths:
+                # Names are only displayed, so undecodable bytes become U+FFFD
+                yield path.decode(errors="replace")
+    finally:
+        process.stdout.close()
+        returncode = process.wait()
+    if pending:
+        yield pending.decode(errors="replace")
+    if returncode:
+        raise subprocess.CalledProcessError(returncode, command)
+
+
+class _Frame:
+    """An open directory while rendering."""
+
+    __slots__ = ("name", "prefix", "lines", "count", "pending", "collapsed")
+
+    def __init__(self, name, prefix="", buffered=False):
+        self.name = name
+        # Absolute line prefix, only used by frames that write straight through
+        self.prefix = prefix
+        # Rendered child lines relative to this frame, or None when streaming
+        self.lines = [] if buffered else None
+        self.count = 0
+        # ASCII mode: the previous child, held until we know whether it is the last
+        self.pending = None
+        self.collapsed = False
+
+
+class TreeRenderer:
+    """
+    Render sorted paths as a tree, emitting lines as soon as possible.
+
+    Paths must arrive in `git ls-tree` order, where everything under a directory
+    is contiguous, so a directory is complete as soon as a path outside it shows up.
+    Open directories are kept on an explicit stack.
+
+    In the default Markdown format, lines are written immediately and memory is
+    bounded by the tree depth. The ASCII format must know whether an entry is the
+    last one in its directory, and `collapse` must know a directory's entry count,
+    so those hold a directory's lines until the directory is complete.
+    """
+
+    def __init__(self, write, use_markdown=True, max_depth=None, collapse=None):
+        self.write = write
+        self.use_markdown = use_markdown
+        self.max_depth = max_depth
+        self.collapse = collapse
+        self.streaming = use_markdown and collapse is None
+        self.stack = [_Frame(None)]
+
+    def add(self, path):
+        parts = path.split("/")
+        is_file = True
+        if self.max_depth is not None and len(parts) > self.max_depth:
+            parts = parts[: self.max_depth]
+            is_file = False
+        directories = parts[:-1] if is_file else parts
+
+        # Close the open directories that this path is not inside of
+        depth = 0
+        while (
+            depth < len(directories)
+            and depth + 1 < len(self.stack)
+            and self.stack[depth + 1].name == directories[depth]
+        ):
+            depth += 1
+        while len(self.stack) > depth + 1:
+            self._close()
+
+        for name in directories[depth:]:
+            self._open(name)
+        if is_file:
+            self._add_entry(self.stack[-1], parts[-1], [])
+
+    def finish(self):
+        while len(self.stack) > 1:
+            self._close()
+        self._flush_pending(self.stack[0], last=True)
+
+    def _output(self, frame, lines):
+        if frame.lines is None:
+            for line in lines:
+                self.write(f"{frame.prefix}{line}\n")
         else:
-            connector = "└── " if is_last_item else "├── "
-            print(f"{prefix}{connector}{name}")
-            new_prefix = f"{prefix}{'    ' if is_last_item else '│   '}"
+            frame.lines.extend(lines)
 
-        if subtree is not None:
-            print_tree(subtree, new_prefix, use_markdown)
+    def _flush_pending(self, frame, last):
+        if frame.pending is None:
+            return
+        name, child_lines = frame.pending
+        frame.pending = None
+        connector, indent = ("└── ", "    ") if last else ("├── ", "│   ")
+        self._output(
+            frame, [f"{connector}{name}"] + [f"{indent}{line}" for line in child_lines]
+        )
+
+    def _add_entry(self, frame, name, child_lines):
+        frame.count += 1
+        is_root = frame is self.stack[0]
+        if self.collapse is not None and frame.count > self.collapse and not is_root:
+            frame.collapsed = True
+            frame.lines = []
+            frame.pending = None
+        if frame.collapsed:
+            return
+        if self.use_markdown:
+            self._output(frame, [f"- {name}"] + [f"  {line}" for line in child_lines])
+        else:
+            self._flush_pending(frame, last=False)
+            frame.pending = (name, child_lines)
+
+    def _open(self, name):
+        parent = self.stack[-1]
+        if self.streaming:
+            # Markdown lines do not depend on what follows, so write the header now
+            parent.count += 1
+            self._output(parent, [f"- {name}"])
+            self.stack.append(_Frame(name, prefix=f"{parent.prefix}  "))
+        else:
+            self.stack.append(_Frame(name, buffered=True))
+
+    def _close(self):
+        frame = self.stack.pop()
+        if self.streaming:
+            return
+        parent = self.stack[-1]
+        if frame.collapsed:
+            self._add_entry(parent, f"{frame.name}/ ({frame.count} entries)", [])
+            return
+        self._flush_pending(frame, last=True)
+        self._add_entry(parent, frame.name, frame.lines)
 
 
 @register_help("git tree")
@@ -42,34 +154,56 @@ def git_tree(subcommand_args):
     Generate a tree-like representation of files in a Git repository.
 
     This command runs a tree-like representation of files, respecting .gitdiffignore.
+    Output is streamed from `git ls-tree`, so it starts immediately even on very
+    large repositories.
 
-    Usage: s git tree [options]
+    Usage: s git tree [options] [<path>...]
 
     Options:
-      --complete    Include all files, ignoring .gitdiffignore
-      --no-markdown Use ASCII characters instead of Markdown format
+      --complete        Include all files, ignoring .gitdiffignore
+      --no-markdown     Use ASCII characters instead of Markdown format
+      --max-depth N     Only show N levels of directories and files
+      --collapse N      Fold directories with more than N entries into one line
     """
     use_markdown = True
     skip_ignore = False
+    max_depth = None
+    collapse = None
+    paths = []
 
-    for arg in subcommand_args:
+    args = iter(subcommand_args)
+    for arg in args:
         if arg == "--complete":
             skip_ignore = True
         elif arg == "--no-markdown":
             use_markdown = False
+        elif arg.split("=")[0] in ("--max-depth", "--collapse"):
+            option, _, value = arg.partition("=")
+            value = value or next(args, "")
+            if not value.isdigit():
+                print(f"Error: {option} expects a number.", file=sys.stderr)
+                sys.exit(1)
+            if option == "--max-depth":
+                max_depth = int(value)
+            else:
+                collapse = int(value)
+        elif not arg.startswith("-"):
+            paths.append(arg)
 
-    try:
-        files = subprocess.check_output(
-            ["git", "ls-tree", "-r", "--name-only", "HEAD"], universal_newlines=True
-        ).splitlines()
-
-        if not skip_ignore:
-            ignore_patterns = get_ignore_patterns()
-            files = [f for f in files if not is_ignored(Path(f), ignore_patterns)]
-
-        tree = build_tree(files)
-        print_tree(tree, use_markdown=use_markdown)
+    command = ["git", "ls-tree", "-r", "-z", "--name-only", "HEAD", "--"] + paths
+    renderer = TreeRenderer(
+        sys.stdout.write,
+        use_markdown=use_markdown,
+        max_depth=max_depth,
+        collapse=collapse,
+    )
+    match = None if skip_ignore else get_ignore_patterns().match
 
+    try:
+        for path in iter_ls_tree(command):
+            if match is None or not match(path):
+                renderer.add(path)
+        renderer.finish()
     except subprocess.CalledProcessError as e:
         print(f"Error executing git ls-tree: {e}", file=sys.stderr)
         sys.exit(e.returncode)
@@ -0,0 +1,244 @@
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from shakti.git.utils import IGNORE_FILE, get_shakti_dir
+
+# Cached messages older than this, or beyond the newest MAX_ENTRIES, are evicted
+MAX_AGE = 7 * 24 * 60 * 60
+MAX_ENTRIES = 50
+
+# A job file younger than this counts as in flight even before its worker has
+# recorded its own pid
+STARTUP_GRACE = 10
+
+# How long `s git message` waits on a background job before calling the model itself
+WAIT_TIMEOUT = 300
+
+
+def staged_tree():
+    """Return the tree hash of the index (`git write-tree`), or None."""
+    try:
+        return subprocess.check_output(
+            ["git", "write-tree"], universal_newlines=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        # No repository, or unmerged entries in the index
+        return None
+
+
+def message_key(tree, token_budget=None, llm_config=None):
+    """
+    Return the cache key of the message for a staged tree, or None without a tree.
+
+    Besides the tree hash, the key covers what else changes the message: the token
+    budget, the llm config (backend, model, ...) and the .gitdiffignore rules.
+    """
+    if tree is None:
+        return None
+    try:
+        with open(IGNORE_FILE, "rb") as f:
+            ignore_rules = f.read()
+    except OSError:
+        ignore_rules = b""
+    digest = hashlib.sha1(
+        json.dumps([token_budget, llm_config], sort_keys=True, default=str).encode()
+    )
+    digest.update(ignore_rules)
+    return f"{tree}-{digest.hexdigest()[:16]}"
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class MessageCache:
+    """
+    Generated commit messages, keyed by message_key: the tree hash of the staged
+    index and the settings the message was generated with.
+
+    Lives in `.git/shakti/messages`: `<key>.txt` holds a finished message and
+    `<key>.pid` marks a background job that is still generating one.
+    """
+
+    def __init__(self, cache_dir=None, max_age=MAX_AGE, max_entries=MAX_ENTRIES):
+        self.cache_dir = cache_dir or os.path.join(get_shakti_dir(), "messages")
+        self.max_age = max_age
+        self.max_entries = max_entries
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _path(self, key, suffix):
+        return os.path.join(self.cache_dir, f"{key}{suffix}")
+
+    def get(self, key):
+        """Return the cached message for a key, or None on a miss."""
+        try:
+            with open(self._path(key, ".txt"), "r", encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def put(self, key, message):
+        """Store a message atomically; failures only cost a future cache miss."""
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(message)
+            os.replace(tmp_path, self._path(key, ".txt"))
+        except OSError:
+            pass
+
+    def claim(self, key):
+        """Mark a job as in flight for a key; False if another job already is."""
+        path = self._path(key, ".pid")
+        for _ in range(2):
+            try:
+                fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL)
+            except FileExistsError:
+                if self.in_flight(key):
+                    return False
+                self.release(key)  # Left behind by a job that died
+                continue
+            with os.fdopen(fd, "w") as f:
+                f.write(str(os.getpid()))
+            return True
+        return False
+
+    def set_job(self, key, pid):
+        """Record the pid of the worker that owns a claimed key."""
+        try:
+            fd = os.open(self._path(key, ".pid"), os.O_WRONLY | os.O_TRUNC)
+        except OSError:
+            return  # The worker already finished
+        with os.fdopen(fd, "w") as f:
+            f.write(str(pid))
+
+    def release(self, key):
+        try:
+            os.remove(self._path(key, ".pid"))
+        except OSError:
+            pass
+
+    def in_flight(self, key):
+        path = self._path(key, ".pid")
+        try:
+            with open(path) as f:
+                pid = f.read().strip()
+            age = time.time() - os.stat(path).st_mtime
+        except OSError:
+            return False
+        return age < STARTUP_GRACE or (pid.isdigit() and _pid_alive(int(pid)))
+
+    def wait(self, key, timeout=WAIT_TIMEOUT):
+        """Wait for an in-flight job on a key and return its message, or None."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            message = self.get(key)
+            if message is not None or not self.in_flight(key):
+                return message if message is not None else self.get(key)
+            time.sleep(0.1)
+        return None
+
+    def evict(self):
+        """Remove messages past `max_age`, then all but the newest `max_entries`."""
+        now = time.time()
+        messages = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            try:
+                mtime = os.stat(path).st_mtime
+            except OSError:
+                continue
+            key, suffix = os.path.splitext(name)
+            if suffix == ".txt":
+                messages.append((mtime, path))
+            elif suffix == ".pid" and not self.in_flight(key):
+                self.release(key)
+            elif suffix == ".tmp" and now - mtime > STARTUP_GRACE:
+                messages.append((0, path))
+
+        messages.sort(reverse=True)
+        for index, (mtime, path) in enumerate(messages):
+            if index >= self.max_entries or now - mtime > self.max_age:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+def start_prefetch(token_budget=None, llm_config=None):
+    """
+    Start generating the message for the current index in a detached worker.
+
+    Returns False if the index already has a message or a job in flight.
+    """
+    key = message_key(staged_tree(), token_budget, llm_config)
+    if key is None:
+        return False
+    cache = MessageCache()
+    if cache.get(key) is not None or not cache.claim(key):
+        return False
+
+    command = [sys.executable, "-m", "shakti.git.message_cache", key]
+    if token_budget is not None:
+        command += ["--token-budget", str(token_budget)]
+    if llm_config:
+        command += ["--llm-config", json.dumps(llm_config)]
+    try:
+        with open(os.path.join(cache.cache_dir, "prefetch.log"), "a") as log:
+            process = subprocess.Popen(
+                command,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=log,
+                start_new_session=True,
+            )
+    except OSError:
+        cache.release(key)
+        return False
+    cache.set_job(key, process.pid)
+    return True
+
+
+def prefetch_worker(key, token_budget=None, llm_config=None):
+    """Generate and cache the message for `key`; runs in the detached worker."""
+    from shakti.git.git_message import prepare_prompt
+    from shakti.llm import get_backend
+
+    cache = MessageCache()
+    cache.set_job(key, os.getpid())
+    try:
+        if message_key(staged_tree(), token_budget, llm_config) != key:
+            return
+        prompt, _ = prepare_prompt(token_budget)
+        if prompt is None:
+            return
+        message = get_backend(llm_config).stream(prompt, lambda text: None).strip()
+        # The index may have changed while the model was busy
+        if message and message_key(staged_tree(), token_budget, llm_config) == key:
+            cache.put(key, message)
+    finally:
+        cache.release(key)
+        cache.evict()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Generate and cache the commit message for a staged tree."
+    )
+    parser.add_argument("key", help="Cache key of the message (message_key)")
+    parser.add_argument("--token-budget", type=int, default=None)
+    parser.add_argument("--llm-config", type=json.loads, default=None)
+    args = parser.parse_args()
+
+    prefetch_worker(args.key, args.token_budget, args.llm_config)
@@ -0,0 +1,97 @@
+import hashlib
+import os
+import tempfile
+
+# Bump when the rendered signature format changes, so stale entries are never served
+CACHE_VERSION = 1
+
+# Total size the cache may grow to before the least recently used entries are evicted
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def default_cache_dir():
+    """Return the signature cache directory under $XDG_CACHE_HOME (or ~/.cache)."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(base, "shakti", "signatures")
+
+
+def blob_hash(data):
+    """Return the git blob hash of the given bytes (same as `git hash-object`)."""
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+class SignatureCache:
+    """
+    On-disk cache of rendered signatures, keyed by file content and options.
+
+    Entries are content-addressed by git blob hash, so they can be shared across
+    repositories and branches. Reads refresh an entry's mtime; `evict` then removes
+    the least recently used entries once the cache exceeds `max_bytes`.
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_bytes = max_bytes
+        self.bytes_written = 0
+
+    def key(self, source, retain_docstring, retain_full_docstring):
+        flags = f"{int(bool(retain_docstring))}{int(bool(retain_full_docstring))}"
+        return f"{blob_hash(source)}-{flags}-v{CACHE_VERSION}"
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key)
+
+    def get(self, key):
+        """Return the cached signature text, or None on a miss."""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+        except OSError:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return text
+
+    def put(self, key, text):
+        """Store signature text atomically; failures only cost a future cache miss."""
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+            self.bytes_written += len(text)
+        except OSError:
+            pass
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in `max_bytes`."""
+        if not self.bytes_written:
+            return
+        entries = []
+        total = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+                total += st.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
@@ -1,27 +1,290 @@
-from pathlib import Path
+import hashlib
+import os
+import re
+import subprocess
+from functools import lru_cache
 
+IGNORE_FILE = ".gitdiffignore"
 
-def is_ignored(file_path, ignore_patterns):
-    path = Path(file_path)
-    for pattern in ignore_patterns:
-        if pattern.endswith("/"):
-            # Directory pattern
-            if path == Path(pattern[:-1]) or path.is_relative_to(pattern):
-                return True
+# Parsed ignore files, keyed by absolute path and invalidated by (mtime, size)
+_IGNORE_FILE_CACHE = {}
+
+
+def _translate_glob(pattern):
+    """Translate the body of a gitignore pattern into a regex fragment."""
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        at_segment_start = i == 0 or pattern[i - 1] == "/"
+        if pattern.startswith("**/", i) and at_segment_start:
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i) and at_segment_start and i + 2 == n:
+            out.append(".*")
+            i += 2
+        elif c == "*":
+            while i + 1 < n and pattern[i + 1] == "*":
+                i += 1
+            out.append("[^/]*")
+            i += 1
+        elif c == "?":
+            out.append("[^/]")
+            i += 1
+        elif c == "[":
+            end = pattern.find("]", i + 2 if pattern.startswith("[!", i) else i + 1)
+            if end == -1:
+                out.append(re.escape(c))
+                i += 1
+                continue
+            body = pattern[i + 1 : end].replace("\\", "\\\\")
+            if body.startswith("!"):
+                body = "^" + body[1:]
+            out.append(f"[{body}]")
+            i = end + 1
+        elif c == "\\" and i + 1 < n:
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            out.append(re.escape(c))
+            i += 1
+    return "".join(out)
+
+
+def _parse_pattern(pattern):
+    """Split one gitignore pattern into (negated, anchored, dir_only, glob)."""
+    negated = pattern.startswith("!")
+    if negated or pattern.startswith("\\!") or pattern.startswith("\\#"):
+        pattern = pattern[1:]
+
+    dir_only = pattern.endswith("/")
+    pattern = pattern.rstrip("/")
+    # A slash anywhere but at the end anchors the pattern to the ignore file's directory
+    anchored = "/" in pattern
+    pattern = pattern.lstrip("/")
+    return negated, anchored, dir_only, pattern
+
+
+def _compile_alternatives(parsed, subtree):
+    """
+    Compile parsed patterns into a single regex `match` function.
+
+    With `subtree`, a pattern also matches everything below the path it names;
+    otherwise only the path itself (directories carry a trailing "/").
+    """
+    anchored, unanchored = [], []
+    for _, is_anchored, dir_only, glob in parsed:
+        body = _translate_glob(glob)
+        if subtree:
+            body += "/.*" if dir_only else "(?:/.*)?"
         else:
-            # File pattern
-            if path.match(pattern):
+            body += "/" if dir_only else "/?"
+        (anchored if is_anchored else unanchored).append(body)
+
+    branches = []
+    if anchored:
+        branches.append(f"(?:{'|'.join(anchored)})")
+    if unanchored:
+        # Unanchored patterns share one "any leading directories" prefix
+        branches.append(f"(?:.*/)?(?:{'|'.join(unanchored)})")
+    return re.compile(rf"(?:\./)?(?:{'|'.join(branches)})\Z", re.DOTALL).match
+
+
+class IgnoreMatcher:
+    """
+    Compiled .gitdiffignore rules with gitignore semantics.
+
+    Supports `*`, `?`, `[...]`, `**`, `!negation`, trailing-slash directory patterns
+    and anchoring. Paths are plain strings relative to the current directory with
+    "/" separators; directories can be matched by passing them with a trailing "/".
+    """
+
+    def __init__(self, patterns):
+        self.patterns = tuple(patterns)
+        parsed = [_parse_pattern(p) for p in self.patterns]
+        self._parsed = parsed
+        self.has_negation = any(negated for negated, _, _, _ in parsed)
+        self._match = None
+        self._runs = []
+
+        if not self.has_negation:
+            # Without negation a path is ignored iff any pattern matches it or one
+            # of its parent directories, which collapses into a single regex.
+            if parsed:
+                self._match = _compile_alternatives(parsed, subtree=True)
+            return
+
+        # With negation the last matching pattern wins, so consecutive patterns of
+        # the same sign are merged into one regex and checked from last to first.
+        runs = []
+        for entry in parsed:
+            if runs and runs[-1][0][0] == entry[0]:
+                runs[-1].append(entry)
+            else:
+                runs.append([entry])
+        self._runs = [
+            (run[0][0], _compile_alternatives(run, subtree=False))
+            for run in reversed(runs)
+        ]
+
+    def __bool__(self):
+        return bool(self.patterns)
+
+    def __iter__(self):
+        return iter(self.patterns)
+
+    def _last_match_ignores(self, path):
+        for negated, match in self._runs:
+            if match(path):
+                return not negated
+        return False
+
+    def match(self, path):
+        """Return True if the path is ignored."""
+        if self._match is not None:
+            return self._match(path) is not None
+        if not self.has_negation:
+            return False
+
+        # A file cannot be re-included if one of its parent directories is excluded
+        start = 2 if path.startswith("./") else 0
+        slash = path.find("/", start)
+        while slash != -1 and slash + 1 < len(path):
+            if self._last_match_ignores(path[: slash + 1]):
                 return True
-    return False
-
-
-def get_ignore_patterns():
-    ignore_file = Path(".gitdiffignore")
-    if ignore_file.exists():
-        with ignore_file.open() as f:
-            return [
-                line.strip()
-                for line in f
-                if line.strip() and not line.strip().startswith("#")
-            ]
-    return []
+            slash = path.find("/", slash + 1)
+        return self._last_match_ignores(path)
+
+    def to_pathspecs(self):
+        """
+        Translate the rules into git `:(exclude,glob)` pathspecs.
+
+        Returns None when the rules use negation, which exclude pathspecs cannot express.
+        """
+        if self.has_negation:
+            return None
+        pathspecs = []
+        for _, anchored, dir_only, glob in self._parsed:
+            if not anchored:
+                glob = f"**/{glob}"
+            if not dir_only:
+                pathspecs.append(f":(exclude,glob){glob}")
+            pathspecs.append(f":(exclude,glob){glob}/**")
+        return pathspecs
+
+    def filter(self, paths):
+        """Return the paths that are not ignored, preserving their order."""
+        if self._match is not None:
+            match = self._match
+            return [path for path in paths if match(path) is None]
+        if not self.has_negation:
+            return list(paths)
+        match = self.match
+        return [path for path in paths if not match(path)]
+
+
+@lru_cache(maxsize=32)
+def compile_ignore_patterns(patterns):
+    """Compile a tuple of gitignore patterns, reusing previously compiled matchers."""
+    return IgnoreMatcher(patterns)
+
+
+def read_ignore_file(ignore_file=IGNORE_FILE):
+    """Read the patterns from an ignore file, skipping blank lines and comments."""
+    with open(ignore_file) as f:
+        return tuple(
+            line.strip()
+            for line in f
+            if line.strip() and not line.strip().startswith("#")
+        )
+
+
+def is_ignored(file_path, ignore_patterns):
+    return ignore_patterns.match(os.fspath(file_path))
+
+
+@lru_cache(maxsize=8)
+def _rev_parse_repo(cwd):
+    try:
+        output = subprocess.check_output(
+            ["git", "rev-parse", "--show-toplevel", "--git-common-dir"],
+            cwd=cwd,
+            universal_newlines=True,
+            stderr=subprocess.DEVNULL,
+        )
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return None
+    toplevel, git_dir = output.splitlines()[:2]
+    return toplevel, os.path.normpath(os.path.join(cwd, git_dir))
+
+
+def get_repo_root():
+    """Return the top-level directory of the current git repository, or None."""
+    repo = _rev_parse_repo(os.getcwd())
+    return repo[0] if repo else None
+
+
+def get_shakti_dir():
+    """
+    Return (creating it) the directory for shakti's per-repository state.
+
+    This is `.git/shakti` inside a git repository, otherwise a directory under
+    $XDG_CACHE_HOME/shakti/repos named after the current directory.
+    """
+    cwd = os.getcwd()
+    repo = _rev_parse_repo(cwd)
+    if repo:
+        shakti_dir = os.path.join(repo[1], "shakti")
+    else:
+        cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+            os.path.expanduser("~"), ".cache"
+        )
+        digest = hashlib.sha1(cwd.encode()).hexdigest()[:16]
+        shakti_dir = os.path.join(cache_home, "shakti", "repos", digest)
+    os.makedirs(shakti_dir, exist_ok=True)
+    return shakti_dir
+
+
+def ignore_pathspec_args(args, ignore_patterns, name_only_command):
+    """
+    Return git diff-style `args` with the ignore rules appended as pathspecs.
+
+    The rules become `:(exclude,glob)` pathspecs, so the filtered diff is a single git
+    invocation however many files changed. Rules with negation cannot be expressed
+    that way; then `name_only_command` lists the changed files and the ignored ones
+    are excluded literally. Returns None if every changed file is ignored.
+    """
+    args = list(args)
+    excludes = ignore_patterns.to_pathspecs()
+    if excludes is None:
+        changed_files = subprocess.check_output(
+            name_only_command, universal_newlines=True
+        ).splitlines()
+        kept = set(ignore_patterns.filter(changed_files))
+        if changed_files and not kept:
+            return None
+        excludes = [
+            f":(top,exclude,literal){file}"
+            for file in changed_files
+            if file not in kept
+        ]
+    if not excludes:
+        return args
+    if "--" not in args:
+        args.append("--")
+    return args + excludes
+
+
+def get_ignore_patterns(ignore_file=IGNORE_FILE):
+    """Return the compiled matcher for the .gitdiffignore in the current directory."""
+    try:
+        st = os.stat(ignore_file)
+    except OSError:
+        return compile_ignore_patterns(())
+
+    key = os.path.abspath(ignore_file)
+    cached = _IGNORE_FILE_CACHE.get(key)
+    if cached is None or cached[0] != (st.st_mtime_ns, st.st_size):
+        cached = ((st.st_mtime_ns, st.st_size), read_ignore_file(ignore_file))
+        _IGNORE_FILE_CACHE[key] = cached
+    return compile_ignore_patterns(cached[1])
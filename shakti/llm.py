@@ -0,0 +1,256 @@
+import abc
+import asyncio
+import codecs
+import http.client
+import json
+import os
+import random
+import socket
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+# Longest wait honoured from a Retry-After header, in seconds
+MAX_RETRY_AFTER = 60
+
+
+class LLMError(Exception):
+    """Raised when a backend fails to produce a completion."""
+
+    def __init__(self, message, details=""):
+        super().__init__(message)
+        self.details = details
+
+
+class LLMBackend(abc.ABC):
+    """
+    Interface for the models behind `s git message`.
+
+    A backend sends a prompt and passes the completion to `write` chunk by chunk as
+    it arrives, returning the full text. Failures raise LLMError.
+    """
+
+    def __init__(self, **options):
+        self.options = options
+
+    @abc.abstractmethod
+    def stream(self, prompt, write):
+        """Send `prompt`, pass the completion to `write` as it arrives and return it."""
+
+
+class AichatBackend(LLMBackend):
+    """Run the aichat CLI (or another command reading the prompt from stdin)."""
+
+    def stream(self, prompt, write):
+        command = self.options.get("command") or ["aichat"]
+        try:
+            return asyncio.run(self._stream(command, prompt, write))
+        except FileNotFoundError:
+            raise LLMError(f"{command[0]} not found")
+
+    @staticmethod
+    async def _stream(command, prompt, write):
+        process = await asyncio.create_subprocess_exec(
+            *command,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+
+        async def feed():
+            try:
+                process.stdin.write(prompt.encode())
+                await process.stdin.drain()
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # The command exited early; its exit status tells us what happened
+            process.stdin.close()
+
+        async def pump():
+            # Chunks can split multi-byte characters, so decode incrementally
+            decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+            chunks = []
+            while chunk := await process.stdout.read(1024):
+                text = decoder.decode(chunk)
+                chunks.append(text)
+                write(text)
+            return "".join(chunks) + decoder.decode(b"", final=True)
+
+        _, output, stderr = await asyncio.gather(feed(), pump(), process.stderr.read())
+        if await process.wait():
+            raise LLMError(
+                f"{command[0]} exited with status {process.returncode}",
+                stderr.decode(errors="replace"),
+            )
+        return output
+
+
+def _retry_after(value):
+    """
+    Return the seconds to wait from a Retry-After header, given in seconds or as
+    an HTTP date, capped at MAX_RETRY_AFTER; None if it is missing or invalid.
+    """
+    if not value:
+        return None
+    try:
+        delay = float(value)
+    except ValueError:
+        try:
+            delay = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    if delay != delay:  # NaN
+        return None
+    return min(max(delay, 0.0), MAX_RETRY_AFTER)
+
+
+class _RetryableError(Exception):
+    def __init__(self, message, retry_after=None, reusable=False):
+        super().__init__(message)
+        self.retry_after = retry_after
+        # Whether the response was read completely, leaving the connection usable
+        self.reusable = reusable
+
+
+class OpenAICompatibleBackend(LLMBackend):
+    """
+    Built-in client for OpenAI-compatible chat completion APIs.
+
+    Responses are streamed (server-sent events) over a kept-alive HTTP connection,
+    which is pooled per host and reused across requests and retries. Connection
+    failures, 429 and 5xx responses are retried with exponential backoff and jitter,
+    or after their Retry-After delay, as long as no output has been written yet.
+
+    Options (llm.openai in config.shakti.yaml): base_url, model, api_key_env,
+    connect_timeout, read_timeout, max_retries, backoff, temperature.
+    """
+
+    # Open connections keyed by (scheme, host, port), shared by all instances
+    _pool = {}
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        url = urlsplit(options.get("base_url", "https://api.openai.com/v1"))
+        self.scheme = url.scheme or "https"
+        self.host = url.hostname
+        self.port = url.port or (443 if self.scheme == "https" else 80)
+        self.path = url.path.rstrip("/") + "/chat/completions"
+        self.model = options.get("model", "gpt-4o-mini")
+        self.api_key = os.environ.get(options.get("api_key_env", "OPENAI_API_KEY"))
+        self.connect_timeout = float(options.get("connect_timeout", 5))
+        self.read_timeout = float(options.get("read_timeout", 60))
+        self.max_retries = int(options.get("max_retries", 3))
+        self.backoff = float(options.get("backoff", 0.5))
+        self.temperature = options.get("temperature")
+        self.attempts = 0
+
+    def _connection(self):
+        key = (self.scheme, self.host, self.port)
+        conn = self._pool.get(key)
+        if conn is None:
+            conn_class = (
+                http.client.HTTPSConnection
+                if self.scheme == "https"
+                else http.client.HTTPConnection
+            )
+            conn = conn_class(self.host, self.port, timeout=self.connect_timeout)
+            self._pool[key] = conn
+        if conn.sock is None:
+            conn.connect()
+            conn.sock.settimeout(self.read_timeout)
+            # Requests are small and latency-bound, so don't wait to coalesce packets
+            conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return conn
+
+    def _discard_connection(self):
+        conn = self._pool.pop((self.scheme, self.host, self.port), None)
+        if conn is not None:
+            conn.close()
+
+    def _request_body(self, prompt):
+        body = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "stream": True,
+        }
+        if self.temperature is not None:
+            body["temperature"] = self.temperature
+        return json.dumps(body).encode()
+
+    def stream(self, prompt, write):
+        body = self._request_body(prompt)
+        headers = {"Content-Type": "application/json", "Accept": "text/event-stream"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+
+        for attempt in range(self.max_retries + 1):
+            self.attempts = attempt + 1
+            started = []
+            try:
+                return self._attempt(body, headers, write, started)
+            except _RetryableError as e:
+                if not e.reusable:
+                    self._discard_connection()
+                if started or attempt == self.max_retries:
+                    raise LLMError(f"Request to {self.host} failed: {e}")
+                delay = e.retry_after
+                if delay is None:
+                    delay = self.backoff * 2**attempt * (0.5 + random.random())
+                time.sleep(delay)
+
+    def _attempt(self, body, headers, write, started):
+        try:
+            conn = self._connection()
+            conn.request("POST", self.path, body=body, headers=headers)
+            response = conn.getresponse()
+        except (OSError, http.client.HTTPException) as e:
+            raise _RetryableError(str(e) or type(e).__name__)
+
+        if response.status != 200:
+            details = response.read().decode(errors="replace")
+            if response.status == 429 or response.status >= 500:
+                raise _RetryableError(
+                    f"HTTP {response.status}",
+                    _retry_after(response.getheader("Retry-After")),
+                    reusable=not response.will_close,
+                )
+            raise LLMError(f"HTTP {response.status} from {self.host}", details)
+
+        chunks = []
+        try:
+            for line in response:
+                line = line.strip()
+                if not line.startswith(b"data:"):
+                    continue
+                data = line[len(b"data:") :].strip()
+                if data == b"[DONE]":
+                    break
+                choices = json.loads(data).get("choices") or [{}]
+                text = (choices[0].get("delta") or {}).get("content")
+                if text:
+                    started.append(True)
+                    chunks.append(text)
+                    write(text)
+            # Drain the rest of the body so the connection can be reused
+            response.read()
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            raise _RetryableError(str(e) or type(e).__name__)
+        if response.will_close:
+            self._discard_connection()
+        return "".join(chunks)
+
+
+BACKENDS = {
+    "aichat": AichatBackend,
+    "openai": OpenAICompatibleBackend,
+}
+
+
+def get_backend(llm_config=None):
+    """Create the backend selected by the `llm` section of config.shakti.yaml."""
+    llm_config = llm_config or {}
+    name = llm_config.get("backend", "aichat")
+    if name not in BACKENDS:
+        raise LLMError(
+            f"Unknown LLM backend '{name}'. Available: {', '.join(sorted(BACKENDS))}"
+        )
+    return BACKENDS[name](**(llm_config.get(name) or {}))
@@ -1,16 +1,61 @@
+import os
 import sys
-import subprocess
-from shakti.bye import bye
-from shakti.hello import hello
-from shakti.git.commands import git
-from shakti.cmd.commands import cmd
-from shakti.utils import slist, shelp, HELP_REGISTRY
-from shakti.report.commands import report
+from importlib import import_module
+
+# Top-level commands and the module/function implementing them. A command's
+# module is only imported once that command is actually invoked, so
+# `s git diff` does not pay for the report stack (numpy, matplotlib, july).
+LAZY_COMMANDS = {
+    "hello": ("shakti.hello", "hello"),
+    "bye": ("shakti.bye", "bye"),
+    "git": ("shakti.git.commands", "git"),
+    "cmd": ("shakti.cmd.commands", "cmd"),
+    "report": ("shakti.report.commands", "report"),
+    "server": ("shakti.server.commands", "server"),
+}
+
+# Modules that register commands and help text. Only imported to build the command
+# manifest (shakti/manifest.py), which --help and --slist read.
+HELP_MODULES = [
+    "shakti.bye",
+    "shakti.hello",
+    "shakti.git.commands",
+    "shakti.git.git_add",
+    "shakti.git.git_message",
+    "shakti.git.git_diff",
+    "shakti.git.git_difftool",
+    "shakti.git.git_tree",
+    "shakti.git.git_signature",
+    "shakti.git.git_symbols",
+    "shakti.cmd.commands",
+    "shakti.cmd.cmd_list",
+    "shakti.cmd.cmd_list_eval",
+    "shakti.report.commands",
+    "shakti.server.commands",
+]
+
+
+def load_command(command):
+    """Import the module implementing a top-level command and return its entry point."""
+    module_name, function_name = LAZY_COMMANDS[command]
+    return getattr(import_module(module_name), function_name)
+
+
+def load_help_modules():
+    """Import every module that registers commands, so the help registries are complete."""
+    for module_name in HELP_MODULES:
+        import_module(module_name)
 
 
 def cli():
     """Shakti CLI"""
     args = sys.argv[1:]
+    if args and args[0] in ("--complete", "--completion-script"):
+        # Shell completion runs on every Tab: it only loads the completion table
+        from shakti.completion import main as completion_main
+
+        sys.exit(completion_main(args))
+
     if not args:
         print("Usage: shakti [options] <command> [options] <subcommand> [args...]")
         sys.exit(1)
@@ -29,37 +74,44 @@ def cli():
         command = ""
 
     if "--help" in shakti_options:
+        from shakti.manifest import load_manifest
+        from shakti.utils import shelp
+
         if command:
             help_identifier = f"{command} {' '.join(args)}".strip()
-            shelp(help_identifier)
+            shelp(help_identifier, load_manifest())
         else:
-            shelp()
+            shelp(manifest=load_manifest())
         sys.exit(0)
 
     if "--slist" in shakti_options and command == "":
-        slist()
+        from shakti.manifest import load_manifest
+        from shakti.utils import slist
+
+        slist(load_manifest())
         sys.exit(0)
 
-    if command == "hello":
-        hello(args)
-    elif command == "bye":
-        bye(args)
-    elif command == "git":
-        git(args)
-    elif command == "cmd":
-        cmd(args)
-    elif command == "report":
-        report(args)
+    if command in LAZY_COMMANDS:
+        load_command(command)(args)
+        return
+
+    # Commands of plugins, installed under the shakti.commands entry point group
+    from shakti.manifest import load_plugin_command
+
+    plugin_command = load_plugin_command(command) if command else None
+    if plugin_command:
+        plugin_command(args)
     else:
-        # If the command is not registered, treat it as a system command
+        # If the command is not registered, treat it as a system command and
+        # replace this process with it, so it gets the terminal and exit code.
         try:
-            subprocess.run([command] + args, check=True)
-        except subprocess.CalledProcessError as e:
-            print(f"Error executing command: {e}", file=sys.stderr)
-            sys.exit(e.returncode)
+            os.execvp(command, [command] + args)
         except FileNotFoundError:
             print(f"Command not found: {command}", file=sys.stderr)
             sys.exit(1)
+        except OSError as e:
+            print(f"Error executing command: {e}", file=sys.stderr)
+            sys.exit(126)
 
 
 if __name__ == "__main__":
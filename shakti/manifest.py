@@ -0,0 +1,245 @@
+import marshal
+import os
+import sys
+import zlib
+from importlib import import_module
+
+# Entry point group third-party packages register top-level commands in, e.g. in
+# pyproject.toml: [project.entry-points."shakti.commands"] deploy = "pkg.cli:deploy"
+# The function is called with the command's arguments, like the built-in commands.
+ENTRY_POINT_GROUP = "shakti.commands"
+
+# Bump when the manifest or the plugin table layout changes
+MANIFEST_VERSION = 3
+PLUGIN_TABLE_VERSION = 1
+
+_MEMO = {}
+
+
+def _cache_path(name):
+    """One file per interpreter, as each sees its own installed plugins."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    digest = zlib.crc32(sys.executable.encode())
+    return os.path.join(base, "shakti", name % f"{digest:08x}")
+
+
+def _manifest_path():
+    return _cache_path("manifest-%s.json")
+
+
+def _plugin_table_path():
+    return _cache_path("plugins-%s.marshal")
+
+
+def _module_file(module_name):
+    """Return the source file of a shakti module, without importing it."""
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    path = os.path.join(package_dir, *module_name.split(".")[1:])
+    return os.path.join(path, "__init__.py") if os.path.isdir(path) else path + ".py"
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _stamp(files):
+    """
+    What the manifest was built from: the sys.path directories, whose mtimes change
+    when distributions (and so entry points) are installed or removed, and the
+    source files of the modules that register commands. sys.path[0] is left out:
+    it is the script's directory, or the working directory under `python -m`.
+    """
+    directories = [path for path in sys.path[1:] if path and os.path.isdir(path)]
+    return [[path, _mtime(path)] for path in directories + files]
+
+
+def _plugin_entry_points():
+    from importlib.metadata import entry_points
+
+    return entry_points(group=ENTRY_POINT_GROUP)
+
+
+def build_plugin_table():
+    """
+    Map each plugin command to the module and function of its entry point, read
+    without importing them. Plugins named like a built-in command are ignored.
+    """
+    from shakti.main import LAZY_COMMANDS
+
+    plugins = {}
+    for entry_point in _plugin_entry_points():
+        if entry_point.name in LAZY_COMMANDS or entry_point.name in plugins:
+            print(
+                f"Warning: plugin command '{entry_point.name}' ({entry_point.value}) "
+                "conflicts with an existing command and is ignored",
+                file=sys.stderr,
+            )
+            continue
+        module_name, _, function_name = entry_point.value.partition(":")
+        plugins[entry_point.name] = [module_name.strip(), function_name.strip()]
+    return {"version": PLUGIN_TABLE_VERSION, "stamp": _stamp([]), "plugins": plugins}
+
+
+def _write_cache(path, write):
+    """Store a cache file atomically; failures only cost rebuilding it next time."""
+    import tempfile
+
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(tmp_path, path)
+    except (OSError, TypeError, ValueError):
+        pass
+
+
+def load_plugin_table():
+    """
+    Return {command: [module, function]} for the plugin commands.
+
+    Every command shakti doesn't know looks here before running as a system
+    command, so the table is stored with marshal (json would pull in `re`) and
+    rebuilt from the entry points only when a sys.path directory changes.
+    """
+    plugins = _MEMO.get("plugins")
+    if plugins is not None:
+        return plugins
+    try:
+        # loads() of the whole file: load() reads the file object by object
+        with open(_plugin_table_path(), "rb") as f:
+            table = marshal.loads(f.read())
+        if table.get("version") == PLUGIN_TABLE_VERSION and table["stamp"] == _stamp(
+            []
+        ):
+            plugins = table["plugins"]
+    except (OSError, EOFError, ValueError, TypeError, AttributeError, KeyError):
+        pass
+    if plugins is None:
+        table = build_plugin_table()
+        _write_cache(_plugin_table_path(), lambda f: marshal.dump(table, f))
+        plugins = table["plugins"]
+    _MEMO["plugins"] = plugins
+    return plugins
+
+
+def build_manifest():
+    """
+    Collect what --help and --slist print, importing every command module and
+    plugin: the top-level commands with the module and function implementing
+    each, the help texts, and the registered commands and shakti options with
+    their descriptions.
+    """
+    from shakti.main import HELP_MODULES, LAZY_COMMANDS
+    from shakti.utils import COMMANDS, HELP_REGISTRY, SHAKTI_OPTIONS
+
+    commands = {name: list(target) for name, target in LAZY_COMMANDS.items()}
+    commands.update(load_plugin_table())
+    files = [_module_file(name) for name in ["shakti.main", "shakti.utils"]]
+    files += [_module_file(name) for name in HELP_MODULES]
+    manifest = {"version": MANIFEST_VERSION, "commands": commands}
+
+    for name in HELP_MODULES:
+        import_module(name)
+    plugins = {}
+    for name, (module_name, function_name) in list(commands.items()):
+        if name in LAZY_COMMANDS:
+            continue
+        try:
+            module = import_module(module_name)
+        except Exception as e:
+            print(
+                f"Warning: could not load plugin command '{name}': {e}",
+                file=sys.stderr,
+            )
+            continue
+        if getattr(module, "__file__", None):
+            files.append(module.__file__)
+        function = getattr(module, function_name, None)
+        if function is None:
+            print(
+                f"Warning: could not load plugin command '{name}': "
+                f"{module_name} has no attribute '{function_name}'",
+                file=sys.stderr,
+            )
+            continue
+        plugins[name] = doc = function.__doc__
+        if name not in HELP_REGISTRY:
+            HELP_REGISTRY[name] = doc
+    manifest["help"] = dict(HELP_REGISTRY)
+    manifest["registered"] = {
+        name: {"description": info["description"], "options": info["options"]}
+        for name, info in COMMANDS.items()
+    }
+    # Plugins that don't use register_command still show in --help and --slist
+    for name, doc in plugins.items():
+        if name not in manifest["registered"]:
+            lines = (doc or "").strip().splitlines()
+            manifest["registered"][name] = {
+                "description": (
+                    lines[0].strip() if lines else "No description provided"
+                ),
+                "options": [],
+            }
+    manifest["options"] = {
+        name: {"description": info["description"]}
+        for name, info in SHAKTI_OPTIONS.items()
+    }
+
+    manifest["files"] = files
+    manifest["stamp"] = _stamp(files)
+    return manifest
+
+
+def load_manifest():
+    """
+    Return the command manifest, rebuilding it when it is missing or stale.
+
+    The manifest is cached as JSON under $XDG_CACHE_HOME/shakti, and rebuilt on
+    first run and whenever a sys.path directory or a command module changes; so
+    reading it imports none of the command modules or plugins. Dispatch doesn't
+    read it: it only needs the plugin table (load_plugin_table).
+    """
+    import json
+
+    manifest = _MEMO.get("manifest")
+    if manifest is None:
+        try:
+            with open(_manifest_path(), "r") as f:
+                cached = json.load(f)
+            if cached.get("version") == MANIFEST_VERSION and cached.get(
+                "stamp"
+            ) == _stamp(cached.get("files", [])):
+                manifest = cached
+        except (OSError, ValueError, AttributeError):
+            pass
+    if manifest is None:
+        manifest = build_manifest()
+        _write_cache(_manifest_path(), lambda f: f.write(json.dumps(manifest).encode()))
+    _MEMO["manifest"] = manifest
+    return manifest
+
+
+def load_plugin_command(command):
+    """
+    Import the module of a plugin command and return its entry point, or None if
+    no plugin provides the command. Exits with an error if the plugin is broken.
+    """
+    target = load_plugin_table().get(command)
+    if target is None:
+        return None
+    module_name, function_name = target
+    try:
+        return getattr(import_module(module_name), function_name)
+    except (ImportError, AttributeError) as e:
+        print(
+            f"Error loading plugin command '{command}' "
+            f"({module_name}:{function_name}): {e}",
+            file=sys.stderr,
+        )
+        sys.exit(1)
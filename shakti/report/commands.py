@@ -1,11 +1,8 @@
 import sys
-import yaml
 import os
-from os.path import expandvars, join
-from importlib import resources
+from os.path import expandvars
+from shakti.config import get_config
 from shakti.utils import register_help, register_command
-from shakti.report.timer import main as timer_main, parse_timer_file, create_heatmap
-from matplotlib.backends.backend_pdf import PdfPages
 
 
 @register_help("report")
@@ -46,12 +43,8 @@ def timer_command(args):
     if args:
         timer_file_path = args[0]
     else:
-        # If no argument is provided, check the config file in the Shakti package
-        shakti_package = resources.files("shakti")
-        config_path = join(shakti_package, "config.shakti.yaml")
-
-        with open(config_path, "r") as config_file:
-            config = yaml.safe_load(config_file)
+        # If no argument is provided, check the config
+        config = get_config()
 
         # Get the timer file path from the config and expand environment variables
         timer_file_path = expandvars(
@@ -62,24 +55,7 @@ def timer_command(args):
     if not os.path.isabs(timer_file_path):
         timer_file_path = os.path.join(os.getcwd(), timer_file_path)
 
-    # Run the timer main function
-    timer_main(timer_file_path)
-
-
-# Add this function to the timer.py file
-def main(timer_file_path):
-    if not os.path.exists(timer_file_path):
-        print(f"Error: {timer_file_path} not found.")
-        return
+    # Run the timer main function (imports numpy/matplotlib, so only load it here)
+    from shakti.report.timer import main as timer_main
 
-    data = parse_timer_file(timer_file_path)
-    fig = create_heatmap(data)
-
-    output_dir = "output"
-    os.makedirs(output_dir, exist_ok=True)
-    output_path = os.path.join(output_dir, "work_activity_heatmap.pdf")
-
-    with PdfPages(output_path) as pdf:
-        pdf.savefig(fig)
-
-    print(f"Heatmap saved as: {os.path.abspath(output_path)}")
+    timer_main(timer_file_path)
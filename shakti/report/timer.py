@@ -1,4 +1,3 @@
-import re
 from datetime import datetime
 import numpy as np
 import matplotlib.pyplot as plt
@@ -7,20 +6,7 @@ from july.utils import date_range
 from matplotlib.backends.backend_pdf import PdfPages
 import os
 import warnings
-
-
-def parse_timer_file(file_path):
-    data = {}
-    with open(file_path, "r") as f:
-        for line in f:
-            match = re.match(
-                r"\[(\d{4}-\d{2}-\d{2}) .*?\] = \[(\d{2}):(\d{2}):(\d{2})\]", line
-            )
-            if match:
-                date, hours, minutes, seconds = match.groups()
-                duration = int(hours) * 3600 + int(minutes) * 60 + int(seconds)
-                data[date] = data.get(date, 0) + duration
-    return data
+from shakti.report.timer_totals import load_daily_totals
 
 
 def create_heatmap(data):
@@ -43,7 +29,7 @@ def main(timer_file_path):
         print(f"Error: {timer_file_path} not found.")
         return
 
-    data = parse_timer_file(timer_file_path)
+    data = load_daily_totals(timer_file_path)
     fig = create_heatmap(data)
 
     output_dir = "output"
@@ -0,0 +1,168 @@
+import mmap
+import re
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Bytes handed to one round of parsing; chunks end on a line boundary
+CHUNK_SIZE = 16 * 1024 * 1024
+
+# A timer line: "[2024-05-01 <anything>] = [01:02:03]", matched at a line start
+TIMER_LINE = re.compile(
+    rb"\[(\d{4})-(\d{2})-(\d{2}) [^\n]*?\] = \[(\d{2}):(\d{2}):(\d{2})\]"
+)
+
+# The common layout, checked at fixed offsets from each end of a line: the date
+# and a space open it, "] = [HH:MM:SS]" closes it. "d" stands for a digit.
+HEAD = b"[dddd-dd-dd "
+TAIL = b"] = [dd:dd:dd]"
+# No timer line is shorter than its head and tail
+MIN_LINE_LENGTH = len(HEAD) + len(TAIL)
+
+NEWLINE, CARRIAGE_RETURN, BRACKET, CLOSING = b"\n\r[]"
+
+
+def _layout(template):
+    """Return the lowest byte allowed in each column, and how far above it may go."""
+    low = np.frombuffer(template.replace(b"d", b"0"), np.uint8)
+    high = np.frombuffer(template.replace(b"d", b"9"), np.uint8)
+    return low, high - low
+
+
+def _matching(view, offsets, template):
+    """
+    Return the len(template) bytes at each offset minus the template's lowest
+    bytes, so that digits hold their value, and a mask of the rows in its layout.
+    """
+    low, span = _layout(template)
+    rows = sliding_window_view(view, len(template))[offsets] - low  # Wraps below
+    return rows, (rows <= span).all(axis=1)
+
+
+def _day_keys(year, month, day):
+    """Day keys as YYYYMMDD integers; the digits may not make a valid date."""
+    return (year * 100 + month) * 100 + day
+
+
+def _parse_chunk(data, view, start):
+    """
+    Return (day keys, seconds) of the timer lines in a chunk of whole lines.
+
+    Lines in the common layout are checked and decoded with array operations;
+    the others starting with "[" go through TIMER_LINE one by one, so the result
+    is what matching TIMER_LINE on every line gives.
+    """
+    ends = np.flatnonzero(view == NEWLINE)
+    if view[-1] != NEWLINE:
+        ends = np.append(ends, len(view))
+    starts = np.concatenate([[0], ends[:-1] + 1])
+    # Leave out the "\r" of "\r\n" line endings
+    ends = ends - (view[np.maximum(ends - 1, 0)] == CARRIAGE_RETURN)
+    # Shorter lines, or ones not opening with "[", can't match TIMER_LINE
+    lines = (ends - starts >= MIN_LINE_LENGTH) & (view[starts] == BRACKET)
+    starts, ends = starts[lines], ends[lines]
+    if not len(starts):
+        return np.empty(0, np.int64), np.empty(0, np.int64)
+
+    head, ok = _matching(view, starts, HEAD)
+    tail, tail_ok = _matching(view, ends - len(TAIL), TAIL)
+    ok &= tail_ok
+    # A "]" in between could make TIMER_LINE's lazy match stop earlier. reduceat
+    # reduces from each bound to the next; an empty middle yields the byte at its
+    # bound, the tail's "]", which only costs the line a regex match.
+    middles = np.column_stack([starts + len(HEAD), ends - len(TAIL)]).ravel()
+    ok &= ~np.logical_or.reduceat(view == CLOSING, middles)[0::2]
+
+    def number(rows, columns):
+        value = np.zeros(len(rows), np.int64)
+        for column in columns:
+            value = value * 10 + rows[:, column]
+        return value
+
+    head, tail = head[ok], tail[ok]
+    keys = _day_keys(
+        number(head, [1, 2, 3, 4]), number(head, [6, 7]), number(head, [9, 10])
+    )
+    seconds = (
+        number(tail, [5, 6]) * 3600 + number(tail, [8, 9]) * 60 + number(tail, [11, 12])
+    )
+
+    # The lines left to the regex: other layouts, or not timer lines at all
+    extra_keys, extra_seconds = [], []
+    for line_start, line_end in zip(starts[~ok].tolist(), ends[~ok].tolist()):
+        match = TIMER_LINE.match(data, start + line_start, start + line_end)
+        if match:
+            year, month, day, hours, minutes, secs = map(int, match.groups())
+            extra_keys.append(_day_keys(year, month, day))
+            extra_seconds.append(hours * 3600 + minutes * 60 + secs)
+    if extra_keys:
+        keys = np.concatenate([keys, np.array(extra_keys, np.int64)])
+        seconds = np.concatenate([seconds, np.array(extra_seconds, np.int64)])
+    return keys, seconds
+
+
+def _daily_totals(keys, seconds):
+    """Return the distinct day keys, sorted, and the seconds summed per day."""
+    days, inverse = np.unique(keys, return_inverse=True)
+    totals = np.bincount(inverse, weights=seconds, minlength=len(days))
+    return days, np.rint(totals).astype(np.int64)
+
+
+def _chunks(data, size, start, end):
+    """Yield (start, end) offsets of chunks of about `size` bytes, ending after a newline."""
+    while start < end:
+        stop = data.find(b"\n", min(start + size, end) - 1, end)
+        stop = end if stop < 0 else stop + 1
+        yield start, stop
+        start = stop
+
+
+def merge_totals(parts):
+    """Merge (day keys, seconds per day) pairs into one, sorted by day."""
+    parts = [(days, seconds) for days, seconds in parts if len(days)]
+    if not parts:
+        return np.empty(0, np.int64), np.empty(0, np.int64)
+    days, seconds = zip(*parts)
+    return _daily_totals(np.concatenate(days), np.concatenate(seconds))
+
+
+def aggregate_timer_bytes(data, chunk_size=CHUNK_SIZE, start=0, end=None):
+    """
+    Return (day keys as YYYYMMDD, seconds per day), sorted by day, for the timer
+    data in data[start:end], which must start at a line boundary.
+
+    `data` is any bytes-like object supporting find(), e.g. an mmap. It is parsed
+    chunk by chunk, each chunk's totals aggregated with np.unique and bincount,
+    and the chunks' totals merged the same way.
+    """
+    end = len(data) if end is None else end
+    view = np.frombuffer(data, np.uint8) if len(data) else np.empty(0, np.uint8)
+    parts = []
+    for chunk_start, chunk_end in _chunks(data, chunk_size, start, end):
+        keys, seconds = _parse_chunk(data, view[chunk_start:chunk_end], chunk_start)
+        parts.append(_daily_totals(keys, seconds))
+    return merge_totals(parts)
+
+
+def totals_to_dict(days, seconds):
+    """Convert day keys and totals to {"YYYY-MM-DD": seconds}."""
+    return {
+        f"{day // 10000:04d}-{day // 100 % 100:02d}-{day % 100:02d}": total
+        for day, total in zip(days.tolist(), seconds.tolist())
+    }
+
+
+def parse_timer_file(file_path, chunk_size=CHUNK_SIZE):
+    """
+    Return the seconds logged per day in a .timer file, as {"YYYY-MM-DD": seconds}.
+
+    The file is memory-mapped and parsed in chunks by aggregate_timer_bytes.
+    """
+    with open(file_path, "rb") as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return {}  # An empty file can't be mapped
+        # Unmapped once the arrays viewing it are gone, not closed: closing fails
+        # while an exception's traceback still holds them
+        days, seconds = aggregate_timer_bytes(data, chunk_size)
+    return totals_to_dict(days, seconds)
@@ -0,0 +1,145 @@
+import hashlib
+import json
+import mmap
+import os
+import tempfile
+import numpy as np
+from shakti.report.timer_parser import (
+    aggregate_timer_bytes,
+    merge_totals,
+    totals_to_dict,
+)
+
+# Bump when the store layout or the parser's results change
+STORE_VERSION = 1
+
+# Bytes hashed at each end of the parsed part of the file to tell whether it
+# was rewritten; bounded, so checking costs the same however long the file is
+CHECK_WINDOW = 64 * 1024
+
+
+def default_store_dir():
+    """Return the timer totals directory under $XDG_CACHE_HOME (or ~/.cache)."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(base, "shakti", "timer-totals")
+
+
+def _checksum(data, offset):
+    """Hash the first and the last CHECK_WINDOW bytes of data[:offset]."""
+    digest = hashlib.sha1(str(offset).encode())
+    digest.update(data[: min(CHECK_WINDOW, offset)])
+    digest.update(data[max(offset - CHECK_WINDOW, 0) : offset])
+    return digest.hexdigest()
+
+
+class TimerTotals:
+    """
+    The daily totals of an append-only .timer file, updated as the file grows.
+
+    The totals of its complete lines are persisted as JSON under
+    $XDG_CACHE_HOME/shakti/timer-totals with the offset parsing stopped at, and a
+    checksum of the bytes around both ends of what was parsed. Later loads only
+    parse what was appended since; when the file got shorter or the checksum no
+    longer matches, it was truncated or rewritten and is parsed from the start.
+    An edit in the middle of a long file, outside both windows, goes unnoticed.
+
+    `pending` holds the totals of a last line without a newline, which may still
+    be being written: they count in as_dict() but aren't persisted.
+    """
+
+    def __init__(self, source, offset, days, seconds, pending=None):
+        self.source = source
+        self.offset = offset
+        self.days = days
+        self.seconds = seconds
+        self.pending = pending
+
+    @staticmethod
+    def _store_location(source, store_dir=None):
+        digest = hashlib.sha1(source.encode()).hexdigest()[:16]
+        return os.path.join(store_dir or default_store_dir(), f"{digest}.json")
+
+    @classmethod
+    def _stored(cls, source, store_dir):
+        """Return (totals, checksum) persisted for a source file, or None."""
+        try:
+            with open(cls._store_location(source, store_dir), "r") as f:
+                stored = json.load(f)
+            if stored["version"] == STORE_VERSION and stored["source"] == source:
+                days = np.array(stored["days"], np.int64)
+                seconds = np.array(stored["seconds"], np.int64)
+                totals = cls(source, stored["offset"], days, seconds)
+                return totals, stored["checksum"]
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        return None
+
+    def _store(self, data, store_dir):
+        """Persist the totals; failures only cost a full parse next time."""
+        path = self._store_location(self.source, store_dir)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(fd, "w") as f:
+                json.dump(
+                    {
+                        "version": STORE_VERSION,
+                        "source": self.source,
+                        "offset": self.offset,
+                        "checksum": _checksum(data, self.offset),
+                        "days": self.days.tolist(),
+                        "seconds": self.seconds.tolist(),
+                    },
+                    f,
+                )
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+
+    @classmethod
+    def load(cls, source, store_dir=None):
+        """
+        Return the totals of a timer file, parsing only what was appended since
+        the last load, or the whole file if it was rewritten.
+        """
+        source = os.path.abspath(source)
+        stored = cls._stored(source, store_dir)
+        with open(source, "rb") as f:
+            try:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                data = b""  # An empty file can't be mapped
+
+            totals = None
+            if stored is not None:
+                previous, checksum = stored
+                if previous.offset <= len(data) and checksum == _checksum(
+                    data, previous.offset
+                ):
+                    totals = previous
+
+            # Stop at the last newline: a line still being written is left for later
+            start = totals.offset if totals else 0
+            end = max(data.rfind(b"\n", start) + 1, start)
+            if totals is None or end > start:
+                appended = aggregate_timer_bytes(data, start=start, end=end)
+                if totals is not None:
+                    appended = merge_totals([(totals.days, totals.seconds), appended])
+                totals = cls(source, end, *appended)
+                totals._store(data, store_dir)
+            totals.pending = aggregate_timer_bytes(data, start=end)
+        return totals
+
+    def as_dict(self):
+        """Return {"YYYY-MM-DD": seconds}, counting a last line without a newline."""
+        parts = [(self.days, self.seconds)]
+        if self.pending is not None:
+            parts.append(self.pending)
+        return totals_to_dict(*merge_totals(parts))
+
+
+def load_daily_totals(file_path, store_dir=None):
+    """Return the seconds logged per day in a .timer file, as {"YYYY-MM-DD": seconds}."""
+    return TimerTotals.load(file_path, store_dir).as_dict()
@@ -0,0 +1,58 @@
+"""
+The per-user directory holding shakti's sockets (the resident server and the black
+daemons), and the checks that keep other local users out of it.
+
+Only the standard library is imported here: the server client imports this on
+every command.
+"""
+
+import os
+import socket
+import stat
+import struct
+
+
+class UnsafeRuntimeDir(PermissionError):
+    """The runtime directory, or the process behind a socket, isn't ours."""
+
+
+def runtime_dir(create=False):
+    """
+    Return $XDG_RUNTIME_DIR/shakti-<uid>, or $TMPDIR (or /tmp)/shakti-<uid>.
+
+    The directory is created with mode 0700 if `create` is set. Anything else at
+    that path, e.g. a directory another user made first in a shared /tmp, raises
+    UnsafeRuntimeDir: it must be a real directory, owned by us, with mode 0700.
+    Raises FileNotFoundError if it doesn't exist and isn't created.
+    """
+    base = os.environ.get("XDG_RUNTIME_DIR") or os.environ.get("TMPDIR") or "/tmp"
+    path = os.path.join(base, f"shakti-{os.getuid()}")
+    if create:
+        try:
+            os.mkdir(path, 0o700)
+        except FileExistsError:
+            pass
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode):
+        raise UnsafeRuntimeDir(f"{path} is not a directory")
+    if st.st_uid != os.getuid():
+        raise UnsafeRuntimeDir(f"{path} is owned by uid {st.st_uid}, not us")
+    if stat.S_IMODE(st.st_mode) != 0o700:
+        raise UnsafeRuntimeDir(f"{path} has mode {stat.S_IMODE(st.st_mode):o}, not 700")
+    return path
+
+
+def check_peer(sock):
+    """
+    Raise UnsafeRuntimeDir unless the process at the other end of a connected Unix
+    socket runs as our uid. Without SO_PEERCRED (not Linux), the directory checks
+    of runtime_dir are all there is.
+    """
+    if not hasattr(socket, "SO_PEERCRED"):
+        return
+    credentials = sock.getsockopt(
+        socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i")
+    )
+    _, uid, _ = struct.unpack("3i", credentials)
+    if uid != os.getuid():
+        raise UnsafeRuntimeDir(f"the socket's peer runs as uid {uid}, not us")
@@ -0,0 +1,101 @@
+import sys
+from shakti.utils import register_help, register_command, command_option
+
+
+@register_help("server")
+def server(args):
+    """Resident shakti server
+
+    Keeps a warm interpreter (imports, parsed config, in-memory caches) running in
+    the background. Commands started through the `shakti-client` entry point run
+    in a process forked from it instead of a fresh interpreter; without a running
+    server, shakti-client runs commands itself as usual. Commands that need a
+    controlling terminal (s cmd list-eval, s git difftool, paged s git diff)
+    always run locally.
+
+    List of subcommands:
+    - s server start [--idle-timeout SECONDS]
+    - s server stop
+    - s server status
+
+    For more information on any subcommand, use --help flag.
+    s --help server start
+    """
+    if not args:
+        print(server.__doc__)
+        return
+
+    subcommand = args[0]
+    subcommand_args = args[1:]
+
+    if subcommand == "start":
+        start(subcommand_args)
+    elif subcommand == "stop":
+        stop()
+    elif subcommand == "status":
+        status()
+    else:
+        print(f"Error: Unknown subcommand '{subcommand}'")
+        sys.exit(1)
+
+
+@register_command("server start")
+@command_option("--idle-timeout SECONDS", "Exit after this long without commands")
+def start(args):
+    """Start the resident shakti server in the background."""
+    from .server import DEFAULT_IDLE_TIMEOUT, control, start as start_server
+
+    idle_timeout = DEFAULT_IDLE_TIMEOUT
+    args = iter(args)
+    for arg in args:
+        if arg == "--idle-timeout" or arg.startswith("--idle-timeout="):
+            value = arg.partition("=")[2] or next(args, "")
+            try:
+                idle_timeout = float(value)
+            except ValueError:
+                print("Error: --idle-timeout expects a number of seconds.")
+                sys.exit(1)
+
+    running = control("status")
+    if running:
+        print(f"Shakti server already running (pid {running['pid']}).")
+        return
+    from shakti.runtime import UnsafeRuntimeDir
+
+    try:
+        started = start_server(idle_timeout)
+    except UnsafeRuntimeDir as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    if not started:
+        print("Error: the shakti server did not start.", file=sys.stderr)
+        sys.exit(1)
+    print(f"Shakti server started (pid {started['pid']}).")
+
+
+@register_command("server stop")
+def stop():
+    """Stop the resident shakti server once its running commands finish."""
+    from .server import control
+
+    reply = control("stop")
+    if not reply:
+        print("Shakti server is not running.")
+        return
+    print(f"Shakti server stopping (pid {reply['pid']}).")
+
+
+@register_command("server status")
+def status():
+    """Show whether the resident shakti server is running."""
+    from .server import control
+
+    reply = control("status")
+    if not reply:
+        print("Shakti server is not running.")
+        sys.exit(1)
+    print(
+        f"Shakti server running (pid {reply['pid']}): up {reply['uptime']:.0f}s, "
+        f"{reply['served']} commands served, {reply['running']} running, "
+        f"idle timeout {reply['idle_timeout']:.0f}s."
+    )
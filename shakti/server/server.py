@@ -0,0 +1,358 @@
+import json
+import os
+import selectors
+import signal
+import socket
+import subprocess
+import sys
+import time
+import traceback
+from importlib import import_module
+from shakti.client import forwarded_env, socket_path
+from shakti.runtime import UnsafeRuntimeDir, check_peer
+
+DEFAULT_IDLE_TIMEOUT = 60 * 60
+
+# Imported up front besides the command modules: the libraries commands import
+# lazily on first use
+PRELOAD_MODULES = ["yaml", "shakti.llm", "shakti.report.timer"]
+
+# Called in the server with the request's working directory before each fork, so
+# the forked command inherits warm caches. Each takes the cwd and may raise.
+WARMERS = []
+
+
+def warmer(func):
+    """Register a function that warms an in-memory cache before each request."""
+    WARMERS.append(func)
+    return func
+
+
+@warmer
+def _warm_config(cwd):
+    from shakti.config import get_config
+
+    get_config(cwd)
+
+
+@warmer
+def _warm_ignore_patterns(cwd):
+    from shakti.git.utils import IGNORE_FILE, get_ignore_patterns
+
+    get_ignore_patterns(os.path.join(cwd, IGNORE_FILE))
+
+
+def preload():
+    """Import every command module, so forked commands start warm."""
+    from shakti.main import LAZY_COMMANDS, load_help_modules
+
+    load_help_modules()
+    for module_name, _ in LAZY_COMMANDS.values():
+        import_module(module_name)
+    for module_name in PRELOAD_MODULES:
+        try:
+            import_module(module_name)
+        except ImportError:
+            pass  # Optional dependencies fail again, with a proper error, on use
+
+
+def _recv_request(conn):
+    data, fds, _, _ = socket.recv_fds(conn, 65536, 3)
+    while data and not data.endswith(b"\n"):
+        chunk = conn.recv(65536)
+        if not chunk:
+            break
+        data += chunk
+    return json.loads(data), fds
+
+
+def _reopen_stdio():
+    # Fresh objects over fds 0-2, so buffering follows the client's terminal
+    sys.stdin = open(0, "r", closefd=False)
+    sys.stdout = open(1, "w", closefd=False)
+    sys.stderr = open(2, "w", closefd=False, buffering=1, errors="backslashreplace")
+
+
+def _run_command(request, fds):
+    """Run one command in a forked child; never returns."""
+    code = 0
+    try:
+        os.setpgid(0, 0)
+        for signum in (signal.SIGCHLD, signal.SIGTERM, signal.SIGHUP):
+            signal.signal(signum, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        signal.set_wakeup_fd(-1)
+
+        for target, fd in enumerate(fds):
+            os.dup2(fd, target)
+            os.close(fd)
+        _reopen_stdio()
+        os.chdir(request["cwd"])
+        # The server's environment, with the client's values for every variable
+        # that is forwarded: one the client doesn't set is unset here too, so e.g.
+        # the GIT_DIR `s server start` ran with doesn't point git elsewhere
+        for name in forwarded_env(os.environ):
+            del os.environ[name]
+        os.environ.update(request["env"])
+        sys.argv = ["shakti"] + request["argv"]
+
+        from shakti.main import cli
+
+        cli()
+    except SystemExit as e:
+        if isinstance(e.code, int):
+            code = e.code
+        elif e.code is not None:
+            print(e.code, file=sys.stderr)
+            code = 1
+    except KeyboardInterrupt:
+        code = 128 + signal.SIGINT
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+    finally:
+        for stream in (sys.stdout, sys.stderr):
+            try:
+                stream.flush()
+            except Exception:
+                pass
+    os._exit(code)
+
+
+class Server:
+    """
+    The resident shakti server.
+
+    Holds the warm imports and caches; every command runs in a child forked from
+    it, with the client's file descriptors 0-2 as its stdio. Children are reaped
+    through a SIGCHLD wakeup fd in the select loop, and their exit status is sent
+    back to the client that asked for them. The server exits after `idle_timeout`
+    seconds without commands.
+    """
+
+    def __init__(self, path=None, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        self.path = path
+        self.idle_timeout = idle_timeout
+        self.children = {}
+        self.served = 0
+        self.started = time.time()
+        self.last_activity = time.monotonic()
+        self.stopping = False
+
+    def _bind(self):
+        if self.path is None:
+            self.path = socket_path(create=True)
+        else:
+            os.makedirs(os.path.dirname(self.path), mode=0o700, exist_ok=True)
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(self.path)
+            raise RuntimeError(f"A shakti server is already listening on {self.path}")
+        except OSError:
+            pass
+        finally:
+            probe.close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(self.path)
+        os.chmod(self.path, 0o600)
+        listener.listen(64)
+        return listener
+
+    def serve(self):
+        self.listener = self._bind()
+        wakeup_r, wakeup_w = socket.socketpair()
+        wakeup_r.setblocking(False)
+        wakeup_w.setblocking(False)
+        signal.signal(signal.SIGCHLD, lambda signum, frame: None)
+        signal.set_wakeup_fd(wakeup_w.fileno())
+        for signum in (signal.SIGTERM, signal.SIGHUP):
+            signal.signal(signum, lambda signum, frame: self._stop())
+
+        self.selector = selector = selectors.DefaultSelector()
+        selector.register(self.listener, selectors.EVENT_READ, "accept")
+        selector.register(wakeup_r, selectors.EVENT_READ, "wakeup")
+        try:
+            while not (self.stopping and not self.children):
+                timeout = None
+                if not self.children and not self.stopping:
+                    idle = time.monotonic() - self.last_activity
+                    timeout = max(0, self.idle_timeout - idle)
+                events = selector.select(timeout)
+                if not events and not self.children and timeout is not None:
+                    break
+                for key, _ in events:
+                    if key.data == "wakeup":
+                        try:
+                            while wakeup_r.recv(4096):
+                                pass
+                        except BlockingIOError:
+                            pass
+                    elif not self.stopping:
+                        self._accept()
+                self._reap()
+        finally:
+            signal.set_wakeup_fd(-1)
+            self._close_listener()
+
+    def _stop(self):
+        self.stopping = True
+        self._close_listener()
+
+    def _close_listener(self):
+        if self.listener.fileno() == -1:
+            return
+        try:
+            self.selector.unregister(self.listener)
+        except (AttributeError, KeyError):
+            pass
+        self.listener.close()
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+    def _accept(self):
+        try:
+            conn, _ = self.listener.accept()
+        except OSError:
+            return
+        self.last_activity = time.monotonic()
+        fds = []
+        try:
+            conn.settimeout(5)
+            check_peer(conn)
+            request, fds = _recv_request(conn)
+            if "control" in request:
+                self._control(conn, request["control"])
+                conn.close()
+                return
+            for warm in WARMERS:
+                try:
+                    warm(request["cwd"])
+                except Exception:
+                    pass
+            # Flush before forking so buffered output isn't written twice
+            sys.stdout.flush()
+            sys.stderr.flush()
+            pid = os.fork()
+            if pid == 0:
+                conn.close()
+                self.listener.close()
+                _run_command(request, fds)
+            conn.settimeout(None)
+            conn.sendall(json.dumps({"pid": pid}).encode() + b"\n")
+            self.children[pid] = conn
+            self.served += 1
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Error handling request: {e}", file=sys.stderr)
+            conn.close()
+        finally:
+            for fd in fds:
+                os.close(fd)
+
+    def _control(self, conn, action):
+        if action == "status":
+            reply = {
+                "pid": os.getpid(),
+                "uptime": time.time() - self.started,
+                "served": self.served,
+                "running": len(self.children),
+                "idle_timeout": self.idle_timeout,
+            }
+        elif action == "stop":
+            self._stop()
+            reply = {"pid": os.getpid(), "stopping": True}
+        else:
+            reply = {"error": f"unknown control action {action!r}"}
+        conn.sendall(json.dumps(reply).encode() + b"\n")
+
+    def _reap(self):
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            conn = self.children.pop(pid, None)
+            self.last_activity = time.monotonic()
+            if conn is None:
+                continue
+            try:
+                message = {"exit": os.waitstatus_to_exitcode(status)}
+                # Killed by a signal: report it the way a shell would
+                if message["exit"] < 0:
+                    message["exit"] = 128 - message["exit"]
+                conn.sendall(json.dumps(message).encode() + b"\n")
+            except OSError:
+                pass
+            conn.close()
+
+
+def control(action, path=None):
+    """Send a control action to a running server; return its reply, or None."""
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.settimeout(5)
+        client.connect(path or socket_path())
+        check_peer(client)
+        client.sendall(json.dumps({"control": action}).encode() + b"\n")
+        return json.loads(client.makefile("rb").readline())
+    except (OSError, ValueError):
+        return None
+    finally:
+        client.close()
+
+
+def start(idle_timeout=DEFAULT_IDLE_TIMEOUT):
+    """
+    Start a detached server; return its status, or None if it didn't come up.
+
+    Raises UnsafeRuntimeDir if the socket's directory isn't safe to use.
+    """
+    socket_path(create=True)
+    command = [
+        sys.executable,
+        "-m",
+        "shakti.server.server",
+        "--idle-timeout",
+        str(idle_timeout),
+    ]
+    subprocess.Popen(
+        command,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        status = control("status")
+        if status:
+            return status
+        time.sleep(0.05)
+    return None
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the resident shakti server.")
+    parser.add_argument(
+        "--idle-timeout",
+        type=float,
+        default=DEFAULT_IDLE_TIMEOUT,
+        help="Seconds without commands before the server exits",
+    )
+    args = parser.parse_args()
+
+    preload()
+    try:
+        Server(idle_timeout=args.idle_timeout).serve()
+    except (RuntimeError, UnsafeRuntimeDir) as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
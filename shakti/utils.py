@@ -1,4 +1,3 @@
-import click
 from functools import wraps
 
 # Initialize COMMANDS and SHAKTI_OPTIONS
@@ -46,22 +45,31 @@ def command_option(name, description):
     return decorator
 
 
+def _registries(manifest):
+    """The help, command and option registries, or their copies in a manifest."""
+    if manifest is None:
+        return HELP_REGISTRY, COMMANDS, SHAKTI_OPTIONS
+    return manifest["help"], manifest["registered"], manifest["options"]
+
+
 @register_option
-def slist():
+def slist(manifest=None):
     """List all available commands and shakti options"""
+    _, commands, options = _registries(manifest)
     print("Available commands:")
-    for name, info in COMMANDS.items():
+    for name, info in commands.items():
         print(f"  {name:<10} {info['description']}")
         for opt, opt_desc in info["options"]:
             print(f"    {opt:<12} {opt_desc}")
     print("\nShakti options:")
-    for opt, info in SHAKTI_OPTIONS.items():
+    for opt, info in options.items():
         print(f"  {opt:<12} {info['description']}")
 
 
-def show_command_help(command):
-    if command in COMMANDS:
-        info = COMMANDS[command]
+def show_command_help(command, manifest=None):
+    _, commands, _ = _registries(manifest)
+    if command in commands:
+        info = commands[command]
         print(f"{command} - {info['description']}")
         if info["options"]:
             print("Options:")
@@ -81,21 +89,22 @@ def register_help(identifier):
     return decorator
 
 
-def shelp(command=None):
+def shelp(command=None, manifest=None):
+    help_registry, commands, options = _registries(manifest)
     if command:
-        if command in HELP_REGISTRY:
-            print(HELP_REGISTRY[command])
-        elif command in COMMANDS:
-            show_command_help(command)
+        if command in help_registry:
+            print(help_registry[command])
+        elif command in commands:
+            show_command_help(command, manifest)
         else:
             print(f"No help available for: {command}")
     else:
         print("Shakti CLI")
         print("\nUsage: shakti [options] <command> [options] <subcommand> [args...]")
         print("\nShakti options:")
-        for opt, info in SHAKTI_OPTIONS.items():
+        for opt, info in options.items():
             print(f"  {opt:<12} {info['description']}")
         print("\nAvailable commands:")
-        for name, info in COMMANDS.items():
+        for name, info in commands.items():
             print(f"  {name:<10} {info['description']}")
         print("\nUse 'shakti --help <command>' for more information about a command.")